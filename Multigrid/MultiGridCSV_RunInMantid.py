@@ -1,51 +1,32 @@
 import numpy as np
-
-def histEventList(evlist):
-    bins = np.histogram(evlist[:, 1], 500)
-    binnedData=np.zeros([500,4*16*48])
-    for i in range(4*16*48):
-        ind = evlist[:, 0] == i
-        tmp=evlist[ind,1]
-       
-        binnedEvents = np.histogram(tmp, bins[1])
-        
-        binnedData[:,i]=binnedEvents[0]
-
-    return bins, binnedData
+from helpers import histEventList
+from voxelcsv import GEOMETRY_FILE, exportCSV, saveGeometry
 
 evlst=np.load('Eventlist.dat.npy')
 
-bins,binneddata=histEventList(evlst)
+bins,binneddata=histEventList(evlst, channels=4*16*48)
 test=CreateWorkspace(bins[1],np.transpose(binneddata),NSpec=4*16*48,UnitX='tof')
 LoadInstrument("test", True, Filename="c:/multigrid/cncs_multigrid1.xml") 
 data = test.extractY()
 data = np.sum(data, axis=1)
 
-with open("MultigridData.csv", "w") as f:
-    f.write("x,y,z,signal,detectorID\n")
-    for i, signal in enumerate(data):
-        det = test.getDetector(i)
-        detPos = det.getPos()
-        detID = det.getID()
-        detShape = det.shape()
-        detBB = detShape.getBoundingBox()
-        xoff = detPos[0]
-        yoff = detPos[1]
-        zoff = detPos[2]
-        x = detBB.minPoint()[0]
-        y = detBB.minPoint()[1]
-        z = detBB.minPoint()[2]
-        dx = detBB.maxPoint()[0] - detBB.minPoint()[0]
-        dy = detBB.maxPoint()[1] - detBB.minPoint()[1]
-        dz = detBB.maxPoint()[2] - detBB.minPoint()[2]
-        f.write(str(xoff+x)+","+str(yoff+y)+","+str(zoff+z)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x+dx)+","+str(yoff+y)+","+str(zoff+z)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x)+","+str(yoff+y+dy)+","+str(zoff+z)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x+dx)+","+str(yoff+y+dy)+","+str(zoff+z)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x)+","+str(yoff+y)+","+str(zoff+z+dz)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x+dx)+","+str(yoff+y)+","+str(zoff+z+dz)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x)+","+str(yoff+y+dy)+","+str(zoff+z+dz)+","+str(signal)+","+str(detID)+"\n")
-        f.write(str(xoff+x+dx)+","+str(yoff+y+dy)+","+str(zoff+z+dz)+","+str(signal)+","+str(detID)+"\n")
-        
+# the Mantid calls are needed per detector, the corners and the csv are
+# computed for all of them at once by voxelcsv.py
+numberOfDetectors = len(data)
+positions = np.zeros((numberOfDetectors, 3))
+minimum = np.zeros((numberOfDetectors, 3))
+maximum = np.zeros((numberOfDetectors, 3))
+detIDs = np.zeros(numberOfDetectors, dtype=np.int64)
+for i in range(numberOfDetectors):
+    det = test.getDetector(i)
+    detPos = det.getPos()
+    detBB = det.shape().getBoundingBox()
+    positions[i] = [detPos[0], detPos[1], detPos[2]]
+    minimum[i] = [detBB.minPoint()[j] for j in range(3)]
+    maximum[i] = [detBB.maxPoint()[j] for j in range(3)]
+    detIDs[i] = det.getID()
+
+saveGeometry(GEOMETRY_FILE, positions, minimum, maximum, detIDs, data)
+exportCSV(GEOMETRY_FILE, "MultigridData.csv")
+
 print "done"
-    
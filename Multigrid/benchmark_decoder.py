@@ -0,0 +1,99 @@
+"""
+Time the decoding of Multigrid binary files. The bundled run is decoded
+whole and in chunks, and synthetic files of growing size made by repeating
+its frames show that the time grows linearly with the size of the file.
+If bitstruct is installed the word by word loop that grew its arrays with
+numpy.append is timed on the first events of the run for comparison. The
+synthetic files are also histogrammed in a pool of processes from a
+memory map, which is how files larger than memory are handled.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy
+from decoder import FRAME_WORDS, decodeFile, findFrames, histogramChannels, mapChunks, readWords
+
+fname = '2016_07_13_beamOn_4p96A_050.bin'
+
+
+def appendLoop(words):
+    """The old cncs_Histogram.py accumulation, one numpy.append per event"""
+    from bitstruct import unpack
+    datastruct = 'u2u9u5u1u1u14'
+    dataCh = [numpy.array(0) for i in range(8)]
+    for start in range(0, words.size - FRAME_WORDS + 1, FRAME_WORDS):
+        eventData = [unpack(datastruct, words[start + i].astype('>u4').tobytes())[5]
+                     for i in range(1, 9)]
+        for i in range(8):
+            dataCh[i] = numpy.append(dataCh[i], numpy.asarray(eventData[i]))
+    return dataCh
+
+
+def timeIt(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def writeSynthetic(filename, frames, size):
+    """Write whole frames over and over until the file has size bytes"""
+    block = frames.tobytes()
+    with open(filename, 'wb') as handle:
+        written = 0
+        while written + len(block) <= size:
+            handle.write(block)
+            written += len(block)
+        remaining = (size - written) // (4 * FRAME_WORDS) * 4 * FRAME_WORDS
+        handle.write(block[:remaining])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the Multigrid decoder")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[64, 256, 1024],
+                        help='sizes of the synthetic files in MB (default 64 256 1024)')
+    parser.add_argument('--chunk', type=int, default=1 << 22,
+                        help='words decoded at a time (default %(default)s)')
+    parser.add_argument('--processes', type=int, help='processes for the parallel histogram '
+                        '(default the number of cores)')
+    parser.add_argument('--tmpdir', help='directory for the synthetic files')
+    options = parser.parse_args()
+
+    words = readWords(fname)
+    size = os.path.getsize(fname) / 1e6
+    for label, chunk in (('whole', None), ('chunked', options.chunk)):
+        seconds, events = timeIt(decodeFile, fname, chunk)
+        print('%-8s %8.1f MB %10d events %8.3f s %8.1f MB/s'
+              % (label, size, events['adc'].shape[0], seconds, size / seconds))
+
+    try:
+        import bitstruct  # noqa: F401
+    except ImportError:
+        print('bitstruct is not installed, skipping the numpy.append loop')
+    else:
+        for numberOfEvents in (1000, 2000, 4000, 8000):
+            seconds, _ = timeIt(appendLoop, words[:numberOfEvents * FRAME_WORDS])
+            print('append   %10d events %8.3f s %8.1f us/event'
+                  % (numberOfEvents, seconds, 1e6 * seconds / numberOfEvents))
+
+    # complete frames of the run to build the synthetic files from
+    starts = findFrames(words)
+    starts = starts[starts + FRAME_WORDS <= words.size]
+    frames = words[starts[:, numpy.newaxis] + numpy.arange(FRAME_WORDS)]
+
+    for megabytes in options.sizes:
+        handle, filename = tempfile.mkstemp(suffix='.bin', dir=options.tmpdir)
+        os.close(handle)
+        try:
+            writeSynthetic(filename, frames, megabytes * 1000000)
+            seconds, events = timeIt(decodeFile, filename, options.chunk)
+            numberOfEvents = events['adc'].shape[0]
+            del events
+            parallel, counts = timeIt(lambda: sum(mapChunks(filename, histogramChannels,
+                                                            options.chunk, options.processes)))
+        finally:
+            os.remove(filename)
+        print('%-8s %8.1f MB %10d events %8.3f s %8.1f MB/s'
+              % ('file', megabytes, numberOfEvents, seconds, megabytes / seconds))
+        print('%-8s %8.1f MB %10d events %8.3f s %8.1f MB/s'
+              % ('pool', megabytes, counts[0].sum(), parallel, megabytes / parallel))
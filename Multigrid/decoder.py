@@ -0,0 +1,263 @@
+import multiprocessing
+import os
+import re
+import numpy as np
+
+# bit layouts of the 32 bit words, most significant field first, as used
+# with bitstruct in cncs_CreateLUT.py and cncs_Histogram.py
+headerStruct = 'u2u6u8u1u3u12'
+datastruct = 'u2u9u5u1u1u14'
+footerStruct = 'u2u30'
+
+HEADER = 1  # value of the first field of a header word
+DATA_WORDS = 8  # one data word per channel follows each header
+FRAME_WORDS = DATA_WORDS + 2  # header, data words and footer
+
+# time stamp convertion = 1 tick 16MHz clock - 0.0625 microsec per tick
+TICK = 0.0625
+
+
+def readWords(fname):
+    """Read a binary file into 32 bit words. The words are stored little
+    endian, which is what bitstruct sees after byteswap('4', ...). A partial
+    word at the end of the file is ignored."""
+    with open(fname, 'rb') as fin:
+        data = fin.read()
+    return np.frombuffer(data, dtype='<u4', count=len(data) // 4)
+
+
+def unpackFields(words, fmt):
+    """Split words into the unsigned fields of a bitstruct format like
+    'u2u30'. Returns one array per field."""
+    widths = [int(width) for width in re.findall(r'u(\d+)', fmt)]
+    if sum(widths) != 32:
+        raise RuntimeError("Format '%s' does not describe a 32 bit word" % fmt)
+    words = np.asarray(words, dtype=np.uint32)
+    fields = []
+    shift = 32
+    for width in widths:
+        shift -= width
+        fields.append((words >> np.uint32(shift)) & np.uint32((1 << width) - 1))
+    return fields
+
+
+def findFrames(words):
+    """Positions of the headers that the word by word reader accepts. After
+    a header the next DATA_WORDS+1 words are taken as data and footer
+    whatever they contain, so a header inside a frame is not a header."""
+    starts = np.flatnonzero(unpackFields(words, headerStruct)[0] == HEADER)
+    close = np.flatnonzero(np.diff(starts) < FRAME_WORDS) + 1
+    if close.size <= 0:
+        return starts
+
+    # only headers closer than a frame to the one before need walking in order
+    keep = np.ones(starts.size, dtype=bool)
+    for i in close:
+        last = i - 1
+        while not keep[last]:
+            last -= 1
+        keep[i] = starts[i] - starts[last] >= FRAME_WORDS
+    return starts[keep]
+
+
+def decodeWords(words, final=True):
+    """
+    Decode a run of 32 bit words into frames of a header, one data word per
+    channel and a footer, exactly as the bitstruct loop does it. If final is
+    False more words follow, so a frame cut off at the end is left for the
+    next call rather than treated as the end of the file.
+
+    Returns a dict of:
+        module: (frames,) module field of the header
+        adc: (frames, 8) last field of the data words
+        channel: (frames, 8) channel field of the data words
+        valid: (frames,) True where the data words are channels 0 to 7 in order
+        timestamp: (frames,) clock ticks of the footer
+        complete: (frames,) False for a last frame cut off before its footer
+        badheaders: number of words skipped while looking for a header
+        badwords: number of data words out of order
+        consumed: number of words decoded, the rest start a frame that
+                  did not fit
+    """
+    words = np.asarray(words, dtype=np.uint32)
+    numWords = words.size
+    starts = findFrames(words)
+    if not final and starts.size > 0 and starts[-1] + FRAME_WORDS > numWords:
+        numWords = int(starts[-1])
+        words = words[:numWords]
+        starts = starts[:-1]
+
+    # every word outside the frames was looked at as a header and skipped
+    consumed = np.minimum(numWords - starts, FRAME_WORDS).sum()
+    badheaders = int(numWords - consumed)
+
+    # a last frame without all of its data words is dropped
+    badwords = 0
+    if starts.size > 0 and starts[-1] + DATA_WORDS >= numWords:
+        partial = words[starts[-1] + 1:]
+        channel = unpackFields(partial, datastruct)[2]
+        badwords += int(np.count_nonzero(channel != np.arange(partial.size)))
+        starts = starts[:-1]
+
+    complete = starts + DATA_WORDS + 1 < numWords
+    module = unpackFields(words[starts], headerStruct)[2].astype(np.uint8)
+    data = words[starts[:, np.newaxis] + np.arange(1, DATA_WORDS + 1)]
+    fields = unpackFields(data, datastruct)
+    channel = fields[2].astype(np.uint8)
+    adc = fields[5].astype(np.uint16)
+    inOrder = channel == np.arange(DATA_WORDS)
+    badwords += int(DATA_WORDS * starts.size - np.count_nonzero(inOrder))
+
+    footers = words[np.minimum(starts + DATA_WORDS + 1, numWords - 1)]
+    timestamp = np.where(complete, unpackFields(footers, footerStruct)[1], 0)
+
+    return {'module': module,
+            'adc': adc,
+            'channel': channel,
+            'valid': np.all(inOrder, axis=1),
+            'timestamp': timestamp.astype(np.uint32),
+            'complete': complete,
+            'badheaders': badheaders,
+            'badwords': badwords,
+            'consumed': numWords}
+
+
+class EventBuffer:
+    """Arrays that events are appended to in blocks. The storage doubles
+    when it is full so appending n events costs O(n) in total."""
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        self.arrays = {}
+        self.counts = {}
+
+    def append(self, events):
+        """Append the arrays of a dict of decoded events and add up the
+        numbers"""
+        arrays = dict((key, value) for key, value in events.items()
+                      if isinstance(value, np.ndarray))
+        for key, value in events.items():
+            if key not in arrays:
+                self.counts[key] = self.counts.get(key, 0) + value
+        if len(arrays) <= 0:
+            return
+        number = len(next(iter(arrays.values())))
+        if self.size + number > self.capacity or len(self.arrays) <= 0:
+            while self.size + number > self.capacity:
+                self.capacity *= 2
+            for key, value in arrays.items():
+                grown = np.empty((self.capacity,) + value.shape[1:], dtype=value.dtype)
+                if key in self.arrays:
+                    grown[:self.size] = self.arrays[key][:self.size]
+                self.arrays[key] = grown
+        for key, value in arrays.items():
+            self.arrays[key][self.size:self.size + number] = value
+        self.size += number
+
+    def result(self):
+        """Dict of the filled part of the arrays and the summed numbers"""
+        result = dict((key, value[:self.size]) for key, value in self.arrays.items())
+        result.update(self.counts)
+        return result
+
+
+def decodeFile(fname, chunkWords=None):
+    """Decode a whole binary file, see decodeWords. With chunkWords the file
+    is read and decoded that many words at a time so the memory used does
+    not depend on the size of the file."""
+    if chunkWords is None:
+        events = decodeWords(readWords(fname))
+        del events['consumed']
+        return events
+
+    events = EventBuffer()
+    carry = np.zeros(0, dtype='<u4')
+    with open(fname, 'rb') as fin:
+        while True:
+            data = fin.read(4 * chunkWords)
+            final = len(data) < 4 * chunkWords
+            words = np.concatenate((carry, np.frombuffer(data, dtype='<u4',
+                                                         count=len(data) // 4)))
+            decoded = decodeWords(words, final)
+            carry = words[decoded.pop('consumed'):]
+            events.append(decoded)
+            if final:
+                break
+    return events.result()
+
+
+def mapWords(fname):
+    """Memory map a binary file as 32 bit words"""
+    numWords = os.path.getsize(fname) // 4
+    if numWords <= 0:
+        return np.zeros(0, dtype='<u4')
+    return np.memmap(fname, dtype='<u4', mode='r', shape=(numWords,))
+
+
+def alignChunk(words, position, window=4096):
+    """First header at or after position with no other header in the frame
+    before it. A word by word reader started anywhere before it can not
+    take it as data, so decoding can start there independently. Returns
+    the number of words if there is none."""
+    if position <= 0:
+        return 0
+    while position < words.size:
+        first = max(position - FRAME_WORDS + 1, 0)
+        stop = min(position + window, words.size)
+        starts = np.flatnonzero(unpackFields(words[first:stop], headerStruct)[0] == HEADER) + first
+        previous = np.concatenate(([-FRAME_WORDS], starts[:-1]))
+        sync = starts[(starts >= position) & (starts - previous >= FRAME_WORDS)]
+        if sync.size > 0:
+            return int(sync[0])
+        position = stop
+    return words.size
+
+
+def decodeChunk(args):
+    """Decode chunk number index of a file and hand the events to function"""
+    fname, index, chunkWords, function = args
+    words = mapWords(fname)
+    start = alignChunk(words, index * chunkWords)
+    stop = alignChunk(words, (index + 1) * chunkWords)
+    final = stop >= words.size
+    events = decodeWords(words[start:stop], final)
+    if events.pop('consumed') != stop - start:
+        raise RuntimeError('Chunk %d of %s did not end on a frame' % (index, fname))
+    return events if function is None else function(events)
+
+
+def mapChunks(fname, function=None, chunkWords=1 << 24, processes=None):
+    """Decode a file chunk by chunk in a pool of processes, yielding
+    function(events) of the chunks in order. The file is memory mapped and
+    only one chunk per process is decoded at a time, so files larger than
+    memory can be processed if function reduces the events."""
+    numWords = os.path.getsize(fname) // 4
+    numChunks = max((numWords + chunkWords - 1) // chunkWords, 1)
+    tasks = [(fname, index, chunkWords, function) for index in range(numChunks)]
+    if processes == 1 or numChunks == 1:
+        for task in tasks:
+            yield decodeChunk(task)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(decodeChunk, tasks):
+            yield result
+    finally:
+        pool.terminate()
+
+
+def decodeParallel(fname, chunkWords=1 << 24, processes=None):
+    """Decode a whole file in a pool of processes, see decodeWords"""
+    events = EventBuffer()
+    for chunk in mapChunks(fname, None, chunkWords, processes):
+        events.append(chunk)
+    return events.result()
+
+
+def histogramChannels(events):
+    """Counts of every ADC value of every channel of the events with all
+    8 data words, an (8, 2**14) array. Partial histograms of chunks add up."""
+    adc = events['adc'][events['valid']]
+    offsets = np.arange(DATA_WORDS) << 14
+    counts = np.bincount((adc.astype(np.int64) + offsets).ravel(), minlength=DATA_WORDS << 14)
+    return counts.reshape(DATA_WORDS, 1 << 14)
@@ -0,0 +1,86 @@
+#!/bin/env python
+from decoder import EventBuffer, alignChunk, decodeFile, decodeParallel, decodeWords, \
+    findFrames, histogramChannels, mapChunks, unpackFields
+import numpy as np
+import os
+import tempfile
+import unittest
+
+
+def frame(adc, timestamp, channels=range(8)):
+    """Words of one event with a header, 8 data words and a footer"""
+    words = [(1 << 30) | (1 << 16) | 9]
+    words += [(32 << 21) | (channel << 16) | value for channel, value in zip(channels, adc)]
+    words.append((3 << 30) | timestamp)
+    return words
+
+
+class TestDecoder(unittest.TestCase):
+    def testUnpack(self):
+        fields = unpackFields([(3 << 30) | 12345, 7], 'u2u30')
+        self.assertEqual(fields[0].tolist(), [3, 0])
+        self.assertEqual(fields[1].tolist(), [12345, 7])
+        self.assertRaises(RuntimeError, unpackFields, [0], 'u2u6')
+
+    def testDecode(self):
+        words = frame(range(100, 108), 5000) + [0, 17] \
+            + frame(range(200, 208), 6000, channels=[0, 1, 2, 4, 3, 5, 6, 7]) \
+            + frame(range(300, 308), 7000)[:9]
+        events = decodeWords(np.array(words, dtype=np.uint32))
+        self.assertEqual(events['adc'][:, 0].tolist(), [100, 200, 300])
+        self.assertEqual(events['module'].tolist(), [1, 1, 1])
+        self.assertEqual(events['valid'].tolist(), [True, False, True])
+        self.assertEqual(events['complete'].tolist(), [True, True, False])
+        self.assertEqual(events['timestamp'][:2].tolist(), [5000, 6000])
+        self.assertEqual((events['badheaders'], events['badwords']), (2, 2))
+
+    def testHeaderInFrame(self):
+        # a frame missing its footer swallows the next header as its footer
+        words = frame(range(8), 1)[:9] + frame(range(8), 2) + frame(range(8), 3)
+        self.assertEqual(findFrames(np.array(words, dtype=np.uint32)).tolist(), [0, 19])
+        events = decodeWords(np.array(words, dtype=np.uint32))
+        self.assertEqual(events['badheaders'], 9)
+        self.assertEqual(events['timestamp'][1], 3)
+
+    def testChunks(self):
+        words = frame(range(8), 1) + [0] + frame(range(8), 2, channels=[1] * 8) * 3 \
+            + frame(range(8), 3)[:9] + frame(range(8), 4) + frame(range(8), 5)[:6]
+        handle, filename = tempfile.mkstemp(suffix=".bin")
+        with os.fdopen(handle, "wb") as handle:
+            handle.write(np.array(words, dtype='<u4').tobytes() + b'\x01')
+        try:
+            whole = decodeFile(filename)
+            for chunk in (1, 4, 10, 11, 1000):
+                events = decodeFile(filename, chunk)
+                self.assertEqual(sorted(events.keys()), sorted(whole.keys()))
+                for key in whole:
+                    np.testing.assert_equal(events[key], whole[key])
+            for chunk, processes in ((4, 1), (11, 2), (25, 2)):
+                events = decodeParallel(filename, chunk, processes)
+                for key in whole:
+                    np.testing.assert_equal(events[key], whole[key])
+            counts = sum(mapChunks(filename, histogramChannels, 25, 2))
+            np.testing.assert_equal(counts, histogramChannels(whole))
+            self.assertEqual(counts[7, 7], 2)
+        finally:
+            os.remove(filename)
+
+    def testAlign(self):
+        words = np.array(frame(range(8), 1)[:9] + frame(range(8), 2) + [0] * 5
+                         + frame(range(8), 3), dtype=np.uint32)
+        # the header at 9 is inside the frame before and can not start a chunk
+        self.assertEqual([alignChunk(words, position) for position in (0, 1, 10, 24, 25)],
+                         [0, 24, 24, 24, 34])
+
+    def testBuffer(self):
+        events = EventBuffer(capacity=2)
+        for i in range(5):
+            events.append({'time': np.arange(i), 'bad': 1})
+        result = events.result()
+        self.assertEqual(result['time'].tolist(), [0, 0, 1, 0, 1, 2, 0, 1, 2, 3])
+        self.assertEqual(result['bad'], 5)
+        self.assertEqual(events.capacity, 16)
+
+
+if __name__ == "__main__":
+    unittest.main(module="decoder_test", verbosity=2)
@@ -0,0 +1,160 @@
+"""
+Columnar store of decoded Multigrid events in an HDF5 file. Every column
+is its own typed dataset, compressed in chunks of CHUNK_EVENTS events, and
+a small index holds the time and module range of each chunk. Reading a
+time range or a set of modules only decompresses the chunks that can hold
+such events, and only the columns that are asked for.
+
+The time stamps count from each pulse, so they are not sorted and the
+index can only rule out chunks whose whole range is outside a selection.
+"""
+import h5py
+import numpy as np
+from decoder import EventBuffer
+
+STORE_SCHEMA = 1  # bump when the layout changes
+CHUNK_EVENTS = 1 << 16
+
+# dtype and width of every column and which of the 8 channels go into it
+COLUMNS = {'time': (np.uint32, None),  # clock ticks of the footer
+           'module': (np.uint8, None),
+           'wire': (np.uint16, [2, 3]),  # position of wire 0 and 1
+           'grid': (np.uint16, [6, 7]),  # position of grid 0 and 1
+           'adc': (np.uint16, [0, 1, 4, 5])}  # energy of wire 0, 1 and grid 0, 1
+
+
+def eventColumns(events):
+    """Split decoded events into the columns of the store. Only the events
+    with all 8 data words and a time are kept."""
+    keep = events['valid'] & events['complete']
+    adc = events['adc'][keep]
+    columns = {'time': events['timestamp'][keep], 'module': events['module'][keep]}
+    for name, (dtype, channels) in COLUMNS.items():
+        if channels is not None:
+            columns[name] = adc[:, channels]
+    return dict((name, np.asarray(columns[name], dtype=COLUMNS[name][0])) for name in COLUMNS)
+
+
+class EventStoreWriter:
+    """Append decoded events to a new store. Events are held until a whole
+    chunk can be written so each chunk of the file has one index entry."""
+    def __init__(self, fname, chunkEvents=CHUNK_EVENTS):
+        self.__file = h5py.File(fname, 'w')
+        self.__file.attrs['schema'] = STORE_SCHEMA
+        self.__chunkEvents = chunkEvents
+        self.__size = 0
+        for name, (dtype, channels) in COLUMNS.items():
+            shape = () if channels is None else (len(channels),)
+            self.__file.create_dataset(name, shape=(0,) + shape, maxshape=(None,) + shape,
+                                       dtype=dtype, chunks=(chunkEvents,) + shape,
+                                       compression='gzip', shuffle=True)
+        self.__index = dict((name, []) for name in ('time_min', 'time_max',
+                                                    'module_min', 'module_max'))
+        self.__pending = EventBuffer()
+
+    def append(self, events):
+        """Add a dict of decoded events, see decoder.decodeWords"""
+        self.__pending.append(eventColumns(events))
+        if self.__pending.size >= self.__chunkEvents:
+            self.__flush(final=False)
+
+    def __flush(self, final):
+        pending = self.__pending.result()
+        number = self.__pending.size
+        full = number if final else number - number % self.__chunkEvents
+        if full <= 0:
+            return
+        for name in COLUMNS:
+            dataset = self.__file[name]
+            dataset.resize(self.__size + full, axis=0)
+            dataset[self.__size:] = pending[name][:full]
+        for start in range(0, full, self.__chunkEvents):
+            stop = min(start + self.__chunkEvents, full)
+            for name in ('time', 'module'):
+                self.__index[name + '_min'].append(pending[name][start:stop].min())
+                self.__index[name + '_max'].append(pending[name][start:stop].max())
+        self.__size += full
+
+        self.__pending = EventBuffer()
+        self.__pending.append(dict((name, pending[name][full:]) for name in COLUMNS))
+
+    def close(self):
+        """Write the rest of the events and the index"""
+        self.__flush(final=True)
+        group = self.__file.create_group('index')
+        group.attrs['chunk_events'] = self.__chunkEvents
+        for name, values in self.__index.items():
+            group.create_dataset(name, data=np.array(values, dtype=COLUMNS[name[:-4]][0]))
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def writeEvents(fname, chunks, chunkEvents=CHUNK_EVENTS):
+    """Write an iterable of decoded event dicts, for example the chunks of
+    decoder.mapChunks, to a new store. Returns the number of events."""
+    if isinstance(chunks, dict):
+        chunks = [chunks]
+    with EventStoreWriter(fname, chunkEvents) as writer:
+        for events in chunks:
+            writer.append(events)
+    with h5py.File(fname, 'r') as handle:
+        return handle['time'].shape[0]
+
+
+def readEvents(fname, columns=None, time=None, modules=None):
+    """
+    Read columns of the events in a time range and set of modules.
+    @param columns names of the columns, all of them if None
+    @param time (start, stop) clock ticks, stop excluded, or None for all
+    @param modules module numbers to keep, or None for all
+    @return dict of column arrays
+    """
+    columns = list(COLUMNS) if columns is None else list(columns)
+    for name in columns:
+        if name not in COLUMNS:
+            raise RuntimeError("No column '%s' in an event store" % name)
+
+    with h5py.File(fname, 'r') as handle:
+        if handle.attrs.get('schema') != STORE_SCHEMA:
+            raise RuntimeError("'%s' is not an event store of schema %d" % (fname, STORE_SCHEMA))
+        index = handle['index']
+        chunkEvents = int(index.attrs['chunk_events'])
+        wanted = np.ones(index['time_min'].shape[0], dtype=bool)
+        if time is not None:
+            wanted &= (index['time_max'][:] >= time[0]) & (index['time_min'][:] < time[1])
+        if modules is not None:
+            modules = np.asarray(modules)
+            inRange = (modules >= index['module_min'][:][:, np.newaxis]) \
+                & (modules <= index['module_max'][:][:, np.newaxis])
+            wanted &= inRange.any(axis=1)
+
+        # the columns that the selection needs are read along with the requested ones
+        needed = set(columns)
+        if time is not None:
+            needed.add('time')
+        if modules is not None:
+            needed.add('module')
+        if len(needed) <= 0:
+            return {}
+        parts = dict((name, []) for name in needed)
+        for chunk in np.flatnonzero(wanted):
+            rows = slice(chunk * chunkEvents, (chunk + 1) * chunkEvents)
+            for name in needed:
+                parts[name].append(handle[name][rows])
+
+    result = {}
+    for name in needed:
+        dtype, channels = COLUMNS[name]
+        shape = (0,) if channels is None else (0, len(channels))
+        result[name] = np.concatenate(parts[name]) if parts[name] else np.zeros(shape, dtype=dtype)
+    keep = np.ones(result[next(iter(needed))].shape[0], dtype=bool)
+    if time is not None:
+        keep &= (result['time'] >= time[0]) & (result['time'] < time[1])
+    if modules is not None:
+        keep &= np.isin(result['module'], modules)
+    return dict((name, result[name][keep]) for name in columns)
@@ -0,0 +1,80 @@
+#!/bin/env python
+from eventstore import CHUNK_EVENTS, EventStoreWriter, eventColumns, readEvents, writeEvents
+import h5py
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def events(number, start=0, module=1):
+    """Decoded events with adc values counting from start"""
+    adc = (start + np.arange(number * 8)).reshape(number, 8) % (1 << 14)
+    return {'module': np.full(number, module, dtype=np.uint8),
+            'adc': adc.astype(np.uint16),
+            'channel': np.tile(np.arange(8, dtype=np.uint8), (number, 1)),
+            'valid': np.ones(number, dtype=bool),
+            'timestamp': (start + np.arange(number)).astype(np.uint32),
+            'complete': np.ones(number, dtype=bool),
+            'badheaders': 0,
+            'badwords': 0}
+
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        self.direc = tempfile.mkdtemp()
+        self.fname = os.path.join(self.direc, 'Events.h5')
+
+    def tearDown(self):
+        shutil.rmtree(self.direc)
+
+    def testColumns(self):
+        decoded = events(3)
+        decoded['valid'][1] = False
+        decoded['complete'][2] = False
+        columns = eventColumns(decoded)
+        self.assertEqual(columns['time'].tolist(), [0])
+        self.assertEqual(columns['wire'].tolist(), [[2, 3]])
+        self.assertEqual(columns['grid'].tolist(), [[6, 7]])
+        self.assertEqual(columns['adc'].tolist(), [[0, 1, 4, 5]])
+        self.assertEqual(columns['module'].dtype, np.uint8)
+
+    def testRoundTrip(self):
+        chunks = [events(5, 0, 1), events(7, 100, 2), events(1, 200, 3), events(0)]
+        self.assertEqual(writeEvents(self.fname, chunks, chunkEvents=4), 13)
+        result = readEvents(self.fname)
+        expected = eventColumns(events(5, 0, 1))
+        self.assertEqual(sorted(result.keys()), sorted(expected.keys()))
+        for name in expected:
+            np.testing.assert_equal(result[name][:5], expected[name])
+            self.assertEqual(result[name].dtype, expected[name].dtype)
+        with h5py.File(self.fname, 'r') as handle:
+            self.assertEqual(handle['index/time_min'][:].tolist(), [0, 4, 103, 200])
+            self.assertEqual(handle['index/module_max'][:].tolist(), [1, 2, 2, 3])
+            self.assertEqual(handle['time'].chunks, (4,))
+
+    def testSelect(self):
+        writeEvents(self.fname, [events(5, 0, 1), events(7, 100, 2), events(1, 200, 3)],
+                    chunkEvents=4)
+        result = readEvents(self.fname, ['wire'], time=(3, 103))
+        self.assertEqual(list(result.keys()), ['wire'])
+        self.assertEqual(result['wire'][:, 0].tolist(), [26, 34, 102, 110, 118])
+        result = readEvents(self.fname, ['time'], modules=[1, 3])
+        self.assertEqual(result['time'].tolist(), [0, 1, 2, 3, 4, 200])
+        result = readEvents(self.fname, ['time', 'module'], time=(0, 1000), modules=[4])
+        self.assertEqual(result['time'].shape, (0,))
+        self.assertRaises(RuntimeError, readEvents, self.fname, ['energy'])
+        self.assertEqual(readEvents(self.fname, []), {})
+        self.assertEqual(readEvents(self.fname, [], time=(0, 10)), {})
+
+    def testEmpty(self):
+        with EventStoreWriter(self.fname):
+            pass
+        result = readEvents(self.fname)
+        self.assertEqual(result['adc'].shape, (0, 4))
+        self.assertEqual(CHUNK_EVENTS % 4, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(module="eventstore_test", verbosity=2)
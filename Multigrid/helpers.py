@@ -12,18 +12,69 @@ def lstSearch(lst,val1,val2,delta):
     return [item for item in lst if np.logical_and(np.logical_and(item[0] >= val1-delta, item[0] <= val1+delta), np.logical_and(item[1] >= val2-delta, item[1] <= val2+delta))]
 
 
-def histEventList(evlist):
-    bins = np.histogram(evlist[:, 1], 500)
-    binnedData=np.zeros([500,8*16*48])
-    for i in range(8*16*48):
-        ind = evlist[:, 0] == i
-        tmp=evlist[ind,1]
-        print('Number of counts in channel ' ,i,' ', len(tmp))
-        binnedEvents = np.histogram(tmp, bins[1])
-        binnedData[:,i]=binnedEvents[0]
+NO_VOXEL = -1  # lookup code for no key in the window
+MANY_VOXELS = -2  # lookup code for more than one key in the window
 
-    return bins, binnedData
 
+def compileLUT(LUT):
+    """Turn a dict of (wire, grid) keys to voxel ids into the sorted wire and
+    grid key values and 2D running sums, over those, of the number of keys
+    and of their voxel ids. Any window of values is then a box whose sums
+    take four lookups."""
+    keys = np.array(list(LUT.keys()), dtype=np.int64).reshape(-1, 2)
+    values = np.array(list(LUT.values()), dtype=np.int64)
+    wires, wireIndex = np.unique(keys[:, 0], return_inverse=True)
+    grids, gridIndex = np.unique(keys[:, 1], return_inverse=True)
+    count = np.zeros((wires.size + 1, grids.size + 1), dtype=np.int64)
+    ids = np.zeros_like(count)
+    np.add.at(count, (wireIndex + 1, gridIndex + 1), 1)
+    np.add.at(ids, (wireIndex + 1, gridIndex + 1), values)
+    return {'wires': wires, 'grids': grids,
+            'count': count.cumsum(axis=0).cumsum(axis=1),
+            'ids': ids.cumsum(axis=0).cumsum(axis=1)}
 
 
+def lutLookup(table, val1, val2, delta):
+    """Vectorized lstSearch for arrays of values. Returns the voxel id where
+    exactly one key is within delta of (val1, val2), NO_VOXEL where there is
+    none and MANY_VOXELS where there are more."""
+    val1 = np.asarray(val1, dtype=np.int64)
+    val2 = np.asarray(val2, dtype=np.int64)
+    w0 = np.searchsorted(table['wires'], val1 - delta, side='left')
+    w1 = np.searchsorted(table['wires'], val1 + delta, side='right')
+    g0 = np.searchsorted(table['grids'], val2 - delta, side='left')
+    g1 = np.searchsorted(table['grids'], val2 + delta, side='right')
 
+    def box(sums):
+        return sums[w1, g1] - sums[w0, g1] - sums[w1, g0] + sums[w0, g0]
+
+    count = box(table['count'])
+    result = np.where(count == 1, box(table['ids']), NO_VOXEL)
+    result[count > 1] = MANY_VOXELS
+    return result
+
+
+def histEventList(evlist, bins=500, channels=8*16*48, sparse=False):
+    """Histogram the times of an event list of (channel, time) rows for
+    every channel in one pass. "bins" is handed to np.histogram of all of the
+    times and each channel uses the same edges, with the last bin closed as
+    np.histogram does. Returns the np.histogram of all events and a
+    (bins, channels) array of counts, or with sparse=True the
+    (bin, channel, count) arrays of the bins that are not empty."""
+    bins = np.histogram(evlist[:, 1], bins)
+    edges = bins[1]
+    numBins = edges.size - 1
+
+    times = evlist[:, 1]
+    index = np.searchsorted(edges, times, side='right') - 1
+    index[times == edges[-1]] = numBins - 1
+    channel = evlist[:, 0]
+    keep = (index >= 0) & (index < numBins) & (channel >= 0) & (channel < channels) \
+        & (channel == np.floor(channel))
+    flat = channel[keep].astype(np.int64) * numBins + index[keep]
+
+    if sparse:
+        flat, counts = np.unique(flat, return_counts=True)
+        return bins, (flat % numBins, flat // numBins, counts)
+    binnedData = np.bincount(flat, minlength=channels * numBins).reshape(channels, numBins)
+    return bins, binnedData.T.astype(float)
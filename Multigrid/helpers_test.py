@@ -0,0 +1,52 @@
+#!/bin/env python
+from helpers import MANY_VOXELS, NO_VOXEL, compileLUT, histEventList, lstSearch, lutLookup
+import numpy as np
+import unittest
+
+
+class TestLookup(unittest.TestCase):
+    def testLstSearch(self):
+        rng = np.random.RandomState(42)
+        LUT = dict(((int(wire), int(grid)), pixID) for pixID, (wire, grid)
+                   in enumerate(rng.randint(0, 200, size=(100, 2))))
+        table = compileLUT(LUT)
+        val1, val2 = rng.randint(-10, 210, size=(2, 500))
+        for delta in (0, 4, 30):
+            pixIDs = lutLookup(table, val1, val2, delta)
+            for wire, grid, pixID in zip(val1, val2, pixIDs):
+                key = lstSearch(list(LUT.keys()), wire, grid, delta)
+                if len(key) == 1:
+                    self.assertEqual(pixID, LUT[key[0]])
+                else:
+                    self.assertEqual(pixID, NO_VOXEL if len(key) == 0 else MANY_VOXELS)
+
+    def testGrid(self):
+        LUT = {(10, 100): 0, (20, 100): 1, (10, 110): 2, (20, 110): 3}
+        table = compileLUT(LUT)
+        pixIDs = lutLookup(table, [9, 21, 15, 0], [104, 109, 100, 100], 4)
+        self.assertEqual(pixIDs.tolist(), [0, 3, NO_VOXEL, NO_VOXEL])
+        self.assertEqual(lutLookup(table, [15, 15], [105, 100], 5).tolist(),
+                         [MANY_VOXELS, MANY_VOXELS])
+        self.assertEqual(lutLookup(compileLUT({}), [1], [1], 4).tolist(), [NO_VOXEL])
+
+
+class TestHistogram(unittest.TestCase):
+    def testChannels(self):
+        rng = np.random.RandomState(3)
+        evlist = np.column_stack((rng.randint(-2, 12, 2000).astype(float), rng.rand(2000)))
+        evlist[::9, 0] += 0.5  # not a channel
+        for bins in (5, [0.2, 0.3, 0.5, 0.9]):
+            total, binnedData = histEventList(evlist, bins, channels=10)
+            self.assertEqual(binnedData.shape, (len(total[0]), 10))
+            for i in range(10):
+                expected = np.histogram(evlist[evlist[:, 0] == i, 1], total[1])[0]
+                np.testing.assert_equal(binnedData[:, i], expected)
+
+            _, (rows, columns, counts) = histEventList(evlist, bins, channels=10, sparse=True)
+            self.assertTrue(np.all(counts > 0))
+            np.testing.assert_equal(binnedData[rows, columns], counts)
+            self.assertEqual(counts.sum(), binnedData.sum())
+
+
+if __name__ == "__main__":
+    unittest.main(module="helpers_test", verbosity=2)
@@ -0,0 +1,88 @@
+"""
+Wire/grid lookup table of the CNCS Multigrid demonstrator. The table is
+derived from the wire (Ch3) and grid (Ch7) position spectra written by
+cncs_Histogram.py and saved as a typed .npz with a schema version and the
+sha1 of the spectra it came from, so it is only derived again when they
+change.
+"""
+import hashlib
+import os
+import numpy as np
+from helpers import find, centerBins
+
+LUT_FILE = 'LUT.npz'
+LUT_SCHEMA = 1  # bump when the contents or the derivation change
+WIRE_FILE = 'Ch3.dat.npy'
+GRID_FILE = 'Ch7.dat.npy'
+
+
+def hashFile(fname):
+    """sha1 hex digest of the contents of a file"""
+    digest = hashlib.sha1()
+    with open(fname, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def createLUT(wiredata, griddata):
+    """Map the (wire, grid) position values at the centers of the position
+    spectra to voxel ids. Returns a dict keyed by the (wire, grid) pair."""
+    indiwire = find(wiredata, 150, 1300)
+    wireHist = np.histogram(wiredata[indiwire], 8 * 16)
+    wireLUVals = centerBins(wireHist[1])
+
+    indigrid = find(griddata, 150, 1000)
+    gridHist = np.histogram(griddata[indigrid], 2 * 48)
+    gridLUVals = centerBins(gridHist[1])
+
+    LUT = dict()
+    # NOTE THE DATA SEEM TO INDICATE THAT THE GRID NUMBERING IS MISREPRESENTED IN THE MULTIGRID.PDF FILE.
+    # IT LOOKS LIKE WIRES 1-64 GO WITH GRIDS 49-96
+    pixID = 0
+    for j in range(48, 96):
+        for k in range(0, 64):
+            LUT.update({(int(wireLUVals[k]), int(gridLUVals[j])): pixID})
+            pixID += 1
+
+    for j in range(0, 48):
+        for k in range(64, 128):
+            LUT.update({(int(wireLUVals[k]), int(gridLUVals[j])): pixID})
+            pixID += 1
+    return LUT
+
+
+def saveLUT(fname, LUT, sources):
+    """Write the table with the names and hashes of the files it came from"""
+    keys = np.array(list(LUT.keys()), dtype=np.int64).reshape(-1, 2)
+    np.savez(fname, schema=np.array(LUT_SCHEMA),
+             wires=keys[:, 0], grids=keys[:, 1],
+             pixels=np.array(list(LUT.values()), dtype=np.int64),
+             sources=np.array([os.path.basename(source) for source in sources]),
+             hashes=np.array([hashFile(source) for source in sources]))
+
+
+def loadLUT(fname, sources=None):
+    """Read a saved table. Returns None if it does not exist, was written
+    with another schema or, when sources are given, came from files with
+    different contents."""
+    if not os.path.exists(fname):
+        return None
+    with np.load(fname, allow_pickle=False) as saved:
+        if 'schema' not in saved.files or int(saved['schema']) != LUT_SCHEMA:
+            return None
+        if sources is not None:
+            hashes = [hashFile(source) for source in sources]
+            if saved['hashes'].tolist() != hashes:
+                return None
+        return dict(zip(zip(saved['wires'].tolist(), saved['grids'].tolist()),
+                        saved['pixels'].tolist()))
+
+
+def getLUT(fname=LUT_FILE, wirefile=WIRE_FILE, gridfile=GRID_FILE):
+    """The saved table if it is current, otherwise derive and save it"""
+    LUT = loadLUT(fname, [wirefile, gridfile])
+    if LUT is None:
+        LUT = createLUT(np.load(wirefile), np.load(gridfile))
+        saveLUT(fname, LUT, [wirefile, gridfile])
+    return LUT
@@ -0,0 +1,51 @@
+#!/bin/env python
+import lut
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestLUT(unittest.TestCase):
+    def setUp(self):
+        self.direc = tempfile.mkdtemp()
+        rng = np.random.RandomState(7)
+        # spectra with 8*16 wire and 2*48 grid peaks over the thresholds of createLUT
+        self.wirefile = os.path.join(self.direc, 'wire.npy')
+        self.gridfile = os.path.join(self.direc, 'grid.npy')
+        np.save(self.wirefile, rng.randint(151, 1300, 5000))
+        np.save(self.gridfile, rng.randint(151, 1000, 5000))
+        self.lutfile = os.path.join(self.direc, 'LUT.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.direc)
+
+    def testRoundTrip(self):
+        LUT = lut.getLUT(self.lutfile, self.wirefile, self.gridfile)
+        self.assertEqual(len(LUT), 8 * 16 * 48)
+        self.assertEqual(sorted(LUT.values()), list(range(8 * 16 * 48)))
+        self.assertEqual(lut.loadLUT(self.lutfile, [self.wirefile, self.gridfile]), LUT)
+        with np.load(self.lutfile) as saved:
+            self.assertEqual(saved['pixels'].dtype, np.int64)
+            self.assertEqual(saved['sources'].tolist(), ['wire.npy', 'grid.npy'])
+
+    def testStale(self):
+        LUT = lut.getLUT(self.lutfile, self.wirefile, self.gridfile)
+        np.save(self.gridfile, np.load(self.gridfile) - 1)
+        self.assertEqual(lut.loadLUT(self.lutfile, [self.wirefile, self.gridfile]), None)
+        self.assertNotEqual(lut.getLUT(self.lutfile, self.wirefile, self.gridfile), LUT)
+        self.assertNotEqual(lut.loadLUT(self.lutfile, [self.wirefile, self.gridfile]), None)
+
+    def testSchema(self):
+        lut.getLUT(self.lutfile, self.wirefile, self.gridfile)
+        with np.load(self.lutfile) as saved:
+            contents = dict((name, saved[name]) for name in saved.files)
+        contents['schema'] = np.array(lut.LUT_SCHEMA + 1)
+        np.savez(self.lutfile, **contents)
+        self.assertEqual(lut.loadLUT(self.lutfile), None)
+        self.assertEqual(lut.loadLUT(self.lutfile + '.missing'), None)
+
+
+if __name__ == "__main__":
+    unittest.main(module="lut_test", verbosity=2)
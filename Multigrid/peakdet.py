@@ -1,4 +1,5 @@
 import sys
+import numpy as np
 from numpy import NaN, Inf, arange, isscalar, array, asarray
 
 
@@ -71,4 +72,118 @@ def peakdet(v, delta, x=None):
                 mxpos = x[i]
                 lookformax = True
 
-    return array(maxtab), array(mintab)
\ No newline at end of file
+    return array(maxtab), array(mintab)
+
+
+def find_peaks(a):
+    """Indices of the bins that are more than 1.8 times both neighbours and
+    above 5% of the maximum. The first two bins are not compared to the bin
+    before them. A 2D array is done row by row and gives a list per row."""
+    x = asarray(a, dtype=float)
+    if x.ndim == 1:
+        return np.flatnonzero(peakMask(x[np.newaxis, :])[0]).tolist()
+    return [np.flatnonzero(row).tolist() for row in peakMask(x)]
+
+
+def peakMask(x):
+    """True where a bin of a (rows, bins) array is a find_peaks peak"""
+    ispeak = x > 0.05 * x.max(axis=1)[:, np.newaxis]
+    ispeak[:, 2:] &= x[:, 2:] > 1.8 * x[:, 1:-1]
+    ispeak[:, :-1] &= x[:, :-1] > 1.8 * x[:, 1:]
+    return ispeak
+
+
+def turningPoints(v):
+    """
+    Mask of the bins of a (rows, bins) array where the slope changes sign,
+    from the signs of np.diff. Only the first bin of a flat top or bottom
+    is kept, along with the first bin and the last one of a final slope.
+    peakdet only reports and switches direction at these bins, so it finds
+    the same peaks on them as on the whole row.
+    """
+    step = np.sign(np.diff(v, axis=1))
+    rows, steps = step.shape
+    # sign of the first non-zero step at or after every step, 0 if there is none
+    position = np.where(step != 0, arange(steps), steps)
+    position = np.minimum.accumulate(position[:, ::-1], axis=1)[:, ::-1]
+    following = np.concatenate((step, np.zeros((rows, 1))), axis=1)[arange(rows)[:, np.newaxis], position]
+    keep = np.ones(v.shape, dtype=bool)
+    keep[:, 1:] = (step != 0) & (step != np.concatenate((following[:, 1:], np.zeros((rows, 1))), axis=1))
+    return keep
+
+
+def peakdetRows(v, delta, x=None):
+    """
+    peakdet of every row of a (rows, bins) array at once.
+
+    Returns two arrays with the columns row, x and value of the maxima and
+    of the minima, sorted by row and then x, or empty arrays if there are
+    none. The peaks are the same as running peakdet on each row.
+
+    Each row is cut down to its turning points. Then every row moves on by
+    one peak per step: the running maximum (of -v when looking for a
+    minimum) from where the row is gives the first turning point that is
+    more than delta below it, and the peak is where that maximum was first
+    reached. The number of steps is the largest number of peaks in a row.
+    """
+    v = asarray(v, dtype=float)
+    rows, bins = v.shape
+    if x is None:
+        x = arange(bins)
+    x = asarray(x)
+
+    if len(x) != bins:
+        sys.exit('Input vectors v and x must have same length')
+
+    if not isscalar(delta):
+        sys.exit('Input argument delta must be a scalar')
+
+    if delta <= 0:
+        sys.exit('Input argument delta must be positive')
+
+    # turning points of each row packed to the left, padded with NaN
+    keep = turningPoints(v)
+    counts = keep.sum(axis=1)
+    width = counts.max() if rows > 0 else 0
+    peakRows, peakBins = np.nonzero(keep)
+    rank = arange(peakRows.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    values = np.full((rows, width), NaN)
+    values[peakRows, rank] = v[peakRows, peakBins]
+    binOf = np.zeros((rows, width), dtype=np.int64)
+    binOf[peakRows, rank] = peakBins
+    column = arange(width)
+
+    found = []  # (row, bin, sign) of the peaks
+    active = arange(rows)
+    start = np.zeros(rows, dtype=np.int64)  # turning point the row starts looking from
+    sign = np.ones(rows)  # 1 while looking for a maximum, -1 for a minimum
+    while active.size > 0:
+        first = start.min()
+        this = sign[:, np.newaxis] * values[active, first:]
+        this[np.isnan(this)] = Inf  # past the end raises the running maximum and never ends a peak
+        this[column[first:] < start[:, np.newaxis]] = -Inf
+        extreme = np.maximum.accumulate(this, axis=1)
+        ended = this < extreme - delta
+        more = ended.any(axis=1)
+        end = ended.argmax(axis=1)
+        top = extreme[arange(active.size), end]
+        peak = (this == top[:, np.newaxis]).argmax(axis=1)
+        more = np.flatnonzero(more)
+        rowsMore = active[more]
+        found.append(np.column_stack((rowsMore, binOf[rowsMore, first + peak[more]], sign[more])))
+
+        active = rowsMore
+        start = first + end[more]
+        sign = -sign[more]
+
+    found = np.concatenate(found).astype(np.int64) if found else np.zeros((0, 3), dtype=np.int64)
+    found = found[np.lexsort((found[:, 1], found[:, 0]))]
+
+    tables = []
+    for kind in (1, -1):
+        peaks = found[found[:, 2] == kind]
+        if len(peaks) <= 0:
+            tables.append(array([]))
+        else:
+            tables.append(np.column_stack((peaks[:, 0], x[peaks[:, 1]], v[peaks[:, 0], peaks[:, 1]])))
+    return tables[0], tables[1]
@@ -0,0 +1,55 @@
+#!/bin/env python
+from peakdet import find_peaks, peakdet, peakdetRows
+import numpy as np
+import unittest
+
+
+def findPeaksLoop(x):
+    """The loop that find_peaks replaced"""
+    ret = []
+    for i in range(len(x)):
+        ispeak = True
+        if i - 1 > 0:
+            ispeak &= (x[i] > 1.8 * x[i - 1])
+        if i + 1 < len(x):
+            ispeak &= (x[i] > 1.8 * x[i + 1])
+        ispeak &= (x[i] > 0.05 * np.max(x))
+        if ispeak:
+            ret.append(i)
+    return ret
+
+
+class TestPeakdet(unittest.TestCase):
+    def testFindPeaks(self):
+        rng = np.random.RandomState(5)
+        spectra = rng.poisson(3, size=(30, 50)).astype(float)
+        self.assertEqual(find_peaks(spectra), [findPeaksLoop(row) for row in spectra])
+        self.assertEqual(find_peaks(spectra[0]), findPeaksLoop(spectra[0]))
+        # the second bin is not compared to the first
+        self.assertEqual(find_peaks([10, 5, 1, 0]), [0, 1])
+
+    def checkRows(self, spectra, delta, x=None):
+        maxima, minima = peakdetRows(spectra, delta, x)
+        for row in range(spectra.shape[0]):
+            for found, expected in zip((maxima, minima), peakdet(spectra[row], delta, x)):
+                found = found[found[:, 0] == row, 1:] if len(found) > 0 else found
+                self.assertEqual(found.tolist(), expected.tolist())
+
+    def testPeakdetRows(self):
+        rng = np.random.RandomState(7)
+        # small counts have flat tops and bottoms, which count from their first bin
+        for delta in (0.5, 1, 2, 3):
+            self.checkRows(rng.randint(0, 6, size=(40, 30)).astype(float), delta)
+        walks = np.cumsum(rng.normal(size=(20, 300)), axis=1)
+        self.checkRows(walks, 3.)
+        self.checkRows(walks, 0.5, 10. + 0.5 * np.arange(300))
+
+        maxima, minima = peakdetRows([[0, 5, 1, 1, 4, 0], [1, 1, 1, 1, 1, 1]], 2)
+        self.assertEqual(maxima.tolist(), [[0, 1, 5], [0, 4, 4]])
+        self.assertEqual(minima.tolist(), [[0, 2, 1]])
+        maxima, minima = peakdetRows(np.ones((3, 4)), 1)
+        self.assertEqual((len(maxima), len(minima)), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main(module="peakdet_test", verbosity=2)
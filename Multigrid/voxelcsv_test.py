@@ -0,0 +1,70 @@
+#!/bin/env python
+from voxelcsv import CORNERS, HEADER, exportCSV, loadGeometry, saveGeometry, voxelCorners, writeCSV
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def loopCSV(positions, minimum, maximum, signal, ids):
+    """Lines of the per corner str() concatenation of the old script"""
+    lines = [HEADER]
+    for pos, low, high, value, detID in zip(positions, minimum, maximum, signal, ids):
+        for dz in (0, high[2] - low[2]):
+            for dy in (0, high[1] - low[1]):
+                for dx in (0, high[0] - low[0]):
+                    lines.append(str(pos[0] + low[0] + dx) + "," + str(pos[1] + low[1] + dy) + ","
+                                 + str(pos[2] + low[2] + dz) + "," + str(value) + "," + str(detID))
+    return lines
+
+
+class TestVoxelCSV(unittest.TestCase):
+    def setUp(self):
+        self.direc = tempfile.mkdtemp()
+        rng = np.random.RandomState(3)
+        self.positions = rng.uniform(-2, 2, (20, 3))
+        self.minimum = rng.uniform(-0.02, 0, (20, 3))
+        self.maximum = self.minimum + rng.uniform(0.001, 0.03, (20, 3))
+        self.signal = rng.randint(0, 1000, 20).astype(float)
+        self.ids = np.arange(20) + 1000
+
+    def tearDown(self):
+        shutil.rmtree(self.direc)
+
+    def testCorners(self):
+        corners = voxelCorners([1, 2, 3], [-0.5, -1, 0], [0.5, 1, 2])
+        self.assertEqual(corners.shape, (1, 8, 3))
+        self.assertEqual(corners[0].tolist(), (np.array([0.5, 1, 3]) + CORNERS * [1, 2, 2]).tolist())
+        self.assertEqual(corners[0, 3].tolist(), [1.5, 3, 3])
+        self.assertEqual(corners[0, 4].tolist(), [0.5, 1, 5])
+
+    def testMatchesLoop(self):
+        fname = os.path.join(self.direc, 'voxels.csv')
+        corners = voxelCorners(self.positions, self.minimum, self.maximum)
+        writeCSV(fname, corners, self.signal, self.ids)
+        with open(fname) as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 1 + 8 * 20)
+        expected = loopCSV(self.positions, self.minimum, self.maximum, self.signal, self.ids)
+        self.assertEqual(lines, expected)
+        self.assertEqual(lines[-1].split(',')[-1], '1019')
+        self.assertRaises(RuntimeError, writeCSV, fname, corners, self.signal[:5], self.ids)
+
+    def testExport(self):
+        geometry = os.path.join(self.direc, 'geometry.npz')
+        output = os.path.join(self.direc, 'voxels.csv')
+        saveGeometry(geometry, self.positions, self.minimum, self.maximum, self.ids)
+        self.assertEqual(sorted(loadGeometry(geometry).keys()),
+                         ['ids', 'maximum', 'minimum', 'positions'])
+        self.assertRaises(RuntimeError, exportCSV, geometry, output)
+        self.assertEqual(exportCSV(geometry, output, self.signal), 20)
+        saveGeometry(geometry, self.positions, self.minimum, self.maximum, self.ids, self.signal)
+        withSignal = os.path.join(self.direc, 'signal.csv')
+        exportCSV(geometry, withSignal)
+        with open(output) as first, open(withSignal) as second:
+            self.assertEqual(first.read(), second.read())
+
+
+if __name__ == "__main__":
+    unittest.main(module="voxelcsv_test", verbosity=2)
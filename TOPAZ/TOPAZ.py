@@ -82,6 +82,21 @@ def writeToFile(xmlOut,append):
     f1.write("\n")
 
 #===============================================================================================
+def memoize(function):
+    """Cache the result of a function of angles, keyed by the angle tuple.
+    The cached matrices are shared so they are made read-only."""
+    cache = {}
+    def wrapper(*args):
+        if args not in cache:
+            result = function(*args)
+            result.flags.writeable = False
+            cache[args] = result
+        return cache[args]
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+#===============================================================================================
+@memoize
 def x_rotation_matrix(polar=0):
     """Generate a rotation matrix for a polar rotation,
     i.e. a rotation about the x axis."""
@@ -94,6 +109,7 @@ def x_rotation_matrix(polar=0):
 
 
 #===============================================================================================
+@memoize
 def rotation_matrix(phi=0, chi=0, omega=0):
     """Generate a rotation matrix M for 3 rotation angles:
        Uses convention of IPNS and ISAW for angles.
@@ -122,6 +138,22 @@ def rotation_matrix(phi=0, chi=0, omega=0):
 
     return M;
 
+#===============================================================================================
+@memoize
+def tilt_matrix(elevation, rotation):
+    """Rotation of the detector face about its center followed by the
+    elevation tilt. Every bank in a ring of detectors shares this part."""
+    return np.dot(x_rotation_matrix(-elevation), rotation_matrix(0, rotation, 0))
+
+#===============================================================================================
+def bank_rotations(azimuths, elevations, rotations):
+    """Rotation matrices of all of the banks, composed in one go.
+    Returns an array of shape (banks, 3, 3)."""
+    tilts = np.array([tilt_matrix(elevation, rotation)
+                      for elevation, rotation in zip(elevations, rotations)])
+    azimuthal = np.array([rotation_matrix(azimuth, 0, 0) for azimuth in azimuths])
+    return np.einsum('nij,njk->nik', azimuthal, tilts)
+
 
 def makeMantidGeometryIntro():
     """ Generate XML code to make a bit of XML for use in the
@@ -267,7 +299,7 @@ def makeMantidGeometryCode(name, idstart, radius, theta_center_rad, phi_center_r
 
 
 #===============================================================================================
-def addBank(instrument, banknum, local_name, azimuth, elevation, rotation, distance):
+def addBank(instrument, banknum, local_name, azimuth, elevation, rotation, distance, rot=None):
     """Add a bank (detector) with given angles.
 
     Parameters:
@@ -278,6 +310,7 @@ def addBank(instrument, banknum, local_name, azimuth, elevation, rotation, dista
         rotation: rotation of the detector face, in rad, around the positive +Z axis.
             For topaz this is -45 degrees.
         distance: in cm, from sample to center of detector face.
+        rot: the rotation matrix from bank_rotations, calculated if not given.
     """
     CM = "centimetre"
     RAD = "radian"
@@ -324,18 +357,14 @@ def addBank(instrument, banknum, local_name, azimuth, elevation, rotation, dista
     u = np.array([1.,0.,0.]).reshape(3,1)
     v = np.array([0.,1.,0.]).reshape(3,1)
 
-    #Ok, first rotate the detector around its center by angle.
-    #Since this is rotation around z axis, it is a chi angle
-    rot = rotation_matrix(0, rotation, 0)
-
-    u_rotated = Vector(np.dot(rot, u))
-    v_rotated = Vector(np.dot(rot, v))
+    if rot is None:
+        #Ok, first rotate the detector around its center by angle.
+        #Since this is rotation around z axis, it is a chi angle.
+        #Then do the elevation rotation, by rotating around the x axis.
+        rot = tilt_matrix(elevation, rotation)
 
-    #Now do the elevation rotation, by rotating around the x axis.
-    rot = np.dot(x_rotation_matrix(-elevation), rot)
-
-    #Finally add an azimuthal rotation (around the y axis, or phi)
-    rot = np.dot(rotation_matrix(azimuth, 0, 0), rot)
+        #Finally add an azimuthal rotation (around the y axis, or phi)
+        rot = np.dot(rotation_matrix(azimuth, 0, 0), rot)
 
     #Now we rotate the base vectors, save them as vectors
     u_rotated = Vector(np.dot(rot, u))
@@ -425,30 +454,28 @@ for row in cr:
 
 all_names = []
 
-for row in rows:
+#Only the detectors that are in use
+rows = [row for row in rows if len(row[8]) > 0]
+
+#Angles in rad
+azimuths = [float(row[2]) for row in rows]
+elevations = [float(row[3]) for row in rows] # As of Feb 14, 2011: File contains the elevation
+rotations = [float(row[4]) for row in rows]
+bank_rots = bank_rotations(azimuths, elevations, rotations)
+
+for i, row in enumerate(rows):
     #Parse each row
     det_name = row[0]
-    #Detector number. 
-    if len(row[8]) > 0: #Is it in use?
-        # Bank number; as of Jan 2011, starts at 10 and goes up to 59.
-        det_num = int(row[0])
-        local_name = "bank%d" % det_num
-        
-        # Is the detector in use?
-        in_use = 0
-        if len(row[8]) > 0:
-            in_use = int(row[8])
-            
-        #Angles in rad
-        azimuth = float(row[2]) 
-        elevation = float(row[3]) # As of Feb 14, 2011: File contains the elevation
-        rotation = float(row[4])
-        
-        #Distance, kept in cm
-        distance = float(row[5])
-
-        addBank(instrument, det_num, local_name, azimuth, elevation, rotation, distance)
-        all_names.append(local_name)
+    # Bank number; as of Jan 2011, starts at 10 and goes up to 59.
+    det_num = int(row[0])
+    local_name = "bank%d" % det_num
+
+    #Distance, kept in cm
+    distance = float(row[5])
+
+    addBank(instrument, det_num, local_name, azimuths[i], elevations[i], rotations[i], distance,
+            rot=bank_rots[i])
+    all_names.append(local_name)
 
 print "<!-- List of all the bank names:"
 print ",".join(all_names)
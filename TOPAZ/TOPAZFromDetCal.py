@@ -1,11 +1,12 @@
 #!/usr/bin/env python
 
 from sns_geometry import Geometry, Component, Maths, Recipe, Vector, \
-     extractValueFromFile, generateGeom, getEuler
+     generateGeom, getEuler, readColumnFile
 
 from math import cos, sin, acos,  atan2, pi, sqrt
 from datetime import datetime, date
 import numpy as np
+import sys
 
 geometry = generateGeom("TOPAZ")
 entry = geometry.getEntry()
@@ -396,42 +397,48 @@ def cmp_row(x,y):
 
 
 
-detCalFile = (raw_input("Please enter the name of the DetCal file: "))
+if len(sys.argv) != 2:
+    print "usage: %s <DetCal file>" % sys.argv[0]
+    sys.exit(1)
+detCalFile = sys.argv[1]
 
 #Now sort by bank number so the output looks better
 # rows.sort(cmp_row)
 
 all_names = []
 
-for row in range(len(open(detCalFile).readlines())):
+# the file is split into rows once and every value is looked up from those
+for elements in readColumnFile(detCalFile).rows:
+    if len(elements) == 0:
+        continue
     #Parse each row
-    flag = extractValueFromFile(detCalFile,None,row,None,0)
+    flag = elements[0]
     #Detector number. 
     if flag == "7": #Is it in use?
-        l1 = float(extractValueFromFile(detCalFile,None,row,None,1))
-        t0 = float(extractValueFromFile(detCalFile,None,row,None,2))
+        l1 = float(elements[1])
+        t0 = float(elements[2])
         print "<!-- XML Code automatically generated on %s for the Mantid instrument definition file from %s -->" % (datetime.now(), detCalFile)
         writeToFile(makeMantidGeometryIntro(l1), "w")
         writeToFile2(makeMantidParameters(t0), "w")
         writeToFile( "<!-- XML Code automatically generated on %s for the Mantid instrument definition file from %s -->" % (datetime.now(), detCalFile), "a")
     if flag == "5": #Is it in use?
         # Bank number; as of Jan 2011, starts at 10 and goes up to 59.
-        det_num = int(extractValueFromFile(detCalFile,None,row,None,1))
+        det_num = int(elements[1])
         local_name = "bank%d" % det_num
         
         #Distance, kept in cm
-        distance = float(extractValueFromFile(detCalFile,None,row,None,7))
-        cenX = float(extractValueFromFile(detCalFile,None,row,None,8))
-        cenY = float(extractValueFromFile(detCalFile,None,row,None,9))
-        cenZ = float(extractValueFromFile(detCalFile,None,row,None,10))
-        baseX = float(extractValueFromFile(detCalFile,None,row,None,11))
-        baseY = float(extractValueFromFile(detCalFile,None,row,None,12))
-        baseZ = float(extractValueFromFile(detCalFile,None,row,None,13))
-        upX = float(extractValueFromFile(detCalFile,None,row,None,14))
-        upY = float(extractValueFromFile(detCalFile,None,row,None,15))
-        upZ = float(extractValueFromFile(detCalFile,None,row,None,16))
-        widX = float(extractValueFromFile(detCalFile,None,row,None,4))
-        widY = float(extractValueFromFile(detCalFile,None,row,None,5))
+        distance = float(elements[7])
+        cenX = float(elements[8])
+        cenY = float(elements[9])
+        cenZ = float(elements[10])
+        baseX = float(elements[11])
+        baseY = float(elements[12])
+        baseZ = float(elements[13])
+        upX = float(elements[14])
+        upY = float(elements[15])
+        upZ = float(elements[16])
+        widX = float(elements[4])
+        widY = float(elements[5])
         center = Vector([cenX,cenY,cenZ])
         base = Vector([baseX,baseY,baseZ])
         up = Vector([upX,upY,upZ])
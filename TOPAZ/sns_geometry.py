@@ -1,32 +1,63 @@
 #!/usr/bin/env python
 
 # imports...
-import xml.dom.minidom
+import os
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import date
+from lxml import etree as le # python-lxml on rpm based systems
+
+class ColumnFile:
+    """Whitespace separated file split into rows once so that values can be
+    looked up by row and column without reading the file again"""
+    def __init__(self, filename):
+        datafile = open(filename, "r")
+        self.rows = [line.split() for line in datafile]
+        datafile.close()
+        if len(self.rows) > 0:
+            self.headers = self.rows[0]
+        else:
+            self.headers = []
+        # first row that starts with each name
+        self._rowByName = {}
+        for i, elements in enumerate(self.rows):
+            if len(elements) > 0 and elements[0] not in self._rowByName:
+                self._rowByName[elements[0]] = i
+
+    def value(self, rowNumber, columnNumber):
+        if rowNumber >= len(self.rows):
+            return None
+        return self.rows[rowNumber][columnNumber]
+
+    def columnNumber(self, columnName):
+        return self.headers.index(columnName)
+
+    def rowNumber(self, bankName):
+        return self._rowByName.get(bankName)
+
+_columnFiles = {}
+
+def readColumnFile(filename):
+    """The ColumnFile for a path, parsed again only when the file changes"""
+    key = os.path.abspath(filename)
+    mtime = os.path.getmtime(filename)
+    if key not in _columnFiles or _columnFiles[key][0] != mtime:
+        _columnFiles[key] = (mtime, ColumnFile(filename))
+    return _columnFiles[key][1]
 
 def extractValueByNumber(filename, bankNumber, columnNumber):
-    datafile = open(filename, "r")
-    i=0
-    for line in datafile:
-        if (i==bankNumber):
-            elements = line.split()
-            return elements[columnNumber]
-        i=i+1    
+    return readColumnFile(filename).value(bankNumber, columnNumber)
 
 def extractValueByName(filename, bankNumber, columnName):
-    datafile = open(filename, "r")
-    headers = datafile.readline().split()
-    columnNumber=headers.index(columnName)
-    return extractValueByNumber(filename, bankNumber, columnNumber)
+    columnFile = readColumnFile(filename)
+    return columnFile.value(bankNumber, columnFile.columnNumber(columnName))
 
 def extractValueByNames(filename, bankName, columnName):
-    datafile=open(filename, "r")
-    i=0
-    for line in datafile:
-        elements=line.split()
-        if (elements[0] == bankName):
-            return extractValueByName(filename, i, columnName)
-        i=i+1
+    columnFile = readColumnFile(filename)
+    i = columnFile.rowNumber(bankName)
+    if i is not None:
+        return extractValueByName(filename, i, columnName)
 
 def extractValueFromFile(filename, bankName=None, bankNumber=None, columnName=None, columnNumber=None):
     if (bankName is None) and (bankNumber is None):
@@ -46,6 +77,51 @@ def extractValueFromFile(filename, bankName=None, bankNumber=None, columnName=No
         return extractValueByNames(filename, bankName, columnName)
 
 
+class XmlWriter:
+    """Indenting wrapper around an lxml incremental writer. Elements are
+    written as the object graph is walked rather than built into a tree.
+    Attributes are written sorted by name as minidom did."""
+    INDENT = "\t"
+
+    def __init__(self, xf):
+        self._xf = xf
+        self._depth = 0
+
+    def _indent(self):
+        self._xf.write("\n" + XmlWriter.INDENT * self._depth)
+
+    @staticmethod
+    def _attributes(attrib):
+        return OrderedDict([(key, attrib[key]) for key in sorted(attrib.keys())])
+
+    @contextmanager
+    def element(self, tag, attrib=None):
+        """Open an element that will have children"""
+        if self._depth > 0:
+            self._indent()
+        with self._xf.element(tag, self._attributes(attrib or {})):
+            self._depth += 1
+            yield
+            self._depth -= 1
+            self._indent()
+
+    def leaf(self, tag, text=None, attrib=None, cdata=False):
+        """Write an element with only text in it"""
+        self._indent()
+        element = le.Element(tag)
+        for key, value in self._attributes(attrib or {}).items():
+            element.set(key, value)
+        if text is not None:
+            if cdata:
+                element.text = le.CDATA(text)
+            else:
+                element.text = text
+        self._xf.write(element)
+
+    def comment(self, text):
+        self._indent()
+        self._xf.write(le.Comment(text))
+
 class MathsEquation():
     """Utility class for equations"""
     def __init__(self, equation, comment):
@@ -65,15 +141,10 @@ class Variable():
     def __repr__(self):
         return "V-%s" % self._name
 
-    def writeXML(self, document, parent):
-        variable = document.createElement("variable")
-        paramName = document.createElement("paramName")
-        paramName.appendChild(document.createTextNode(self._param))
-        variable.appendChild(paramName)
-        varName = document.createElement("varName")
-        varName.appendChild(document.createTextNode(self._var))
-        variable.appendChild(varName)
-        parent.appendChild(variable)
+    def writeXML(self, writer):
+        with writer.element("variable"):
+            writer.leaf("paramName", self._param)
+            writer.leaf("varName", self._var)
 
 class Parameter():
     """Utility class for Parameters"""
@@ -92,42 +163,31 @@ class Parameter():
     def __repr__(self):
         return "P-%s" % self._name
 
-    def writeXML(self, document, parent):
-        parameter=document.createElement("parameter")
-       
+    def writeXML(self, writer):
+        attrib = {}
         if self._name is not None:
-            parameter.setAttribute("name",self._name)
-       
+            attrib["name"] = self._name
         if self._type is not None:
-            parameter.setAttribute("type",self._type)
-       
-        if self._units is not None:
-            parameter_units=document.createElement("units")
-            parameter_units.appendChild(document.createTextNode(self._units))
-            parameter.appendChild(parameter_units)
-                
-        # TODO: make this next line workout the datatype..
-        if '.' in self._value:
-            datatype = "floatvalue"
-        else:
-            datatype="intvalue"
-            
-        parameter_value=document.createElement(datatype)
-        parameter_value.appendChild(document.createTextNode(self._value))
-        parameter.appendChild(parameter_value)
-        
-        parent.appendChild(parameter)
+            attrib["type"] = self._type
+
+        with writer.element("parameter", attrib):
+            if self._units is not None:
+                writer.leaf("units", self._units)
+
+            # TODO: make this next line workout the datatype..
+            if '.' in self._value:
+                datatype = "floatvalue"
+            else:
+                datatype="intvalue"
+            writer.leaf(datatype, self._value)
     
 class MathParameter():
     def __init__(self, name, type):
         self._name = name
         self._type = type
     
-    def writeXML(self, document, parent):
-        mathpar=document.createElement("parameter")
-        mathpar.setAttribute("name", self._name)
-        mathpar.setAttribute("type", self._type)
-        parent.appendChild(mathpar) 
+    def writeXML(self, writer):
+        writer.leaf("parameter", attrib={"name":self._name, "type":self._type})
     
 class Recipe():
     """Recipe class"""
@@ -156,41 +216,31 @@ class Recipe():
     def setComment(self, comment):
         self._comment = comment
 
-    def writeXML(self, document, parent):
+    def writeXML(self, writer):
         # put the comment above the element
         if not (self._comment == None):
-            parent.appendChild(document.createComment(self._comment))
-        
-        recipe=document.createElement("recipe")
-        parent.appendChild(recipe)
-        
-        name = document.createElement("name")
-        name.appendChild(document.createTextNode(self._name))
-        recipe.appendChild(name)
-      
-        #  Write the parameterList
-        parameterList=document.createElement("parameterList")
-        recipe.appendChild(parameterList)
-        
-        # Recipe
-        if self._recipe is not None:
-            recipe_member=document.createElement("recipe")
-            recipe_member.appendChild(document.createTextNode(self._recipe))
-            parameterList.appendChild(recipe_member)
-        
-        # Helper
-        if self._helper is not None:
-            helper=document.createElement("helper")
-            helper.appendChild(document.createTextNode(self._helper))
-            parameterList.appendChild(helper)
-        
-        #  Write the parameters
-        for i in range(len(self._parameters)):
-            self._parameters[i].writeXML(document, parameterList)
-            
-        #  Write the variables
-        for i in range(len(self._variables)):
-            self._variables[i].writeXML(document, parameterList)
+            writer.comment(self._comment)
+
+        with writer.element("recipe"):
+            writer.leaf("name", self._name)
+
+            #  Write the parameterList
+            with writer.element("parameterList"):
+                # Recipe
+                if self._recipe is not None:
+                    writer.leaf("recipe", self._recipe)
+
+                # Helper
+                if self._helper is not None:
+                    writer.leaf("helper", self._helper)
+
+                #  Write the parameters
+                for parameter in self._parameters:
+                    parameter.writeXML(writer)
+
+                #  Write the variables
+                for variable in self._variables:
+                    variable.writeXML(writer)
       
         
 class Maths():
@@ -217,50 +267,36 @@ class Maths():
         else:
             self._definitions = self._definitions + [Parameter(name, value, type, units)]
         
-    def writeXML(self, document, parent):
+    def writeXML(self, writer):
         # Add a comment
-        parent.appendChild(document.createComment(" MATH "))
-        
-        maths=document.createElement("math")
-        parent.appendChild(maths)
-
-        # Definitions
-        if (len(self._definitions) > 0):
-            definitions = document.createElement("definitions")
-            maths.appendChild(definitions)
-            for i in range(len(self._definitions)):
-                self._definitions[i].writeXML(document, definitions)
-
-        # Inputs
-        if (len(self._inputs) > 0):
-            inputs = document.createElement("inputs")
-            maths.appendChild(inputs)
-            for i in range(len(self._inputs)):
-                input=document.createElement("parameter")
-                input.setAttribute("name", self._inputs[i]._name)
-                input.setAttribute("type", self._inputs[i]._type)
-                inputs.appendChild(input)
-              
-        # Equations
-        if (len(self._equations) > 0):
-            equations=document.createElement("equations")
-            maths.appendChild(equations)
-            for i in range(len(self._equations)):
-                if not (self._equations[i]._comment == None):
-                    equations.appendChild(document.createComment(self._equations[i]._comment))
-                equation=document.createElement("equation")
-                equation.appendChild(document.createTextNode(self._equations[i]._equation))
-                equations.appendChild(equation)
-        
-        # Outputs
-        if (len(self._outputs) > 0):
-            outputs = document.createElement("outputs")
-            maths.appendChild(outputs)
-            for i in range(len(self._outputs)):
-                output=document.createElement("parameter")
-                output.setAttribute("name", self._outputs[i]._name)
-                output.setAttribute("type", self._outputs[i]._type)
-                outputs.appendChild(output)        
+        writer.comment(" MATH ")
+
+        with writer.element("math"):
+            # Definitions
+            if (len(self._definitions) > 0):
+                with writer.element("definitions"):
+                    for definition in self._definitions:
+                        definition.writeXML(writer)
+
+            # Inputs
+            if (len(self._inputs) > 0):
+                with writer.element("inputs"):
+                    for input in self._inputs:
+                        input.writeXML(writer)
+
+            # Equations
+            if (len(self._equations) > 0):
+                with writer.element("equations"):
+                    for equation in self._equations:
+                        if not (equation._comment == None):
+                            writer.comment(equation._comment)
+                        writer.leaf("equation", equation._equation)
+
+            # Outputs
+            if (len(self._outputs) > 0):
+                with writer.element("outputs"):
+                    for output in self._outputs:
+                        output.writeXML(writer)
 
 class Instrument():
     """NXinstrument class"""
@@ -288,19 +324,16 @@ class Instrument():
     def setComment(self, comment):
         self._comment = comment
 
-    def writeXML(self, document, parent):
+    def writeXML(self, writer):
         if self._comment is None:
-            parent.appendChild(document.createComment(" INSTRUMENT "))
+            writer.comment(" INSTRUMENT ")
         else:
-            parent.appendChild(document.createComment(self._comment))
-        
-        instrument=document.createElement("instrument")
-        instrument.setAttribute("name", self._name)
-        parent.appendChild(instrument)
-        
-        #  Components
-        for i in range(len(self._components)):
-            self._components[i].writeXML(document, instrument)
+            writer.comment(self._comment)
+
+        with writer.element("instrument", {"name":self._name}):
+            #  Components
+            for component in self._components:
+                component.writeXML(writer)
 
 #### COMPONENTS ####      
 class Component():
@@ -320,49 +353,42 @@ class Component():
     def getName(self):
         return self._name
     
-    def writeXML(self, document, element):
+    def writeXML(self, writer):
         if not (self._comment == None):
-            element.appendChild(document.createComment(self._comment))
+            writer.comment(self._comment)
 
-        component=document.createElement("component")
-        component.setAttribute("type", self._type)
-        component.setAttribute("name", self._name)
-        element.appendChild(component)
-        
-        #  Write the annotation          
-        if not (self._annotation == None):
-            annotation=document.createElement("annotation")
-            component.appendChild(annotation)
-            annotation_cdata=document.createCDATASection(self._annotation)
-            annotation.appendChild(annotation_cdata)
-        
-        if ((self._recipe is None) and (self._helper is None) and
-           (len(self._parameters) == 0) and (len(self._variables) == 0)):
+        attrib = {"type":self._type, "name":self._name}
+        hasParameters = not ((self._recipe is None) and (self._helper is None) and
+                             (len(self._parameters) == 0) and (len(self._variables) == 0))
+        if (self._annotation == None) and not hasParameters:
+            writer.leaf("component", attrib=attrib)
             return
-        
-        #  Write the parameterList
-        parameterList=document.createElement("parameterList")
-        component.appendChild(parameterList)
-        
-        # Recipe
-        if self._recipe is not None:
-            recipe=document.createElement("recipe")
-            recipe.appendChild(document.createTextNode(self._recipe))
-            parameterList.appendChild(recipe)
-        
-        # Helper
-        if self._helper is not None:
-            helper=document.createElement("helper")
-            helper.appendChild(document.createTextNode(self._helper))
-            parameterList.appendChild(helper)
-        
-        #  Write the parameters
-        for i in range(len(self._parameters)):
-            self._parameters[i].writeXML(document, parameterList)
-            
-        #  Write the variables
-        for i in range(len(self._variables)):
-            self._variables[i].writeXML(document, parameterList)
+
+        with writer.element("component", attrib):
+            #  Write the annotation
+            if not (self._annotation == None):
+                writer.leaf("annotation", self._annotation, cdata=True)
+
+            if not hasParameters:
+                return
+
+            #  Write the parameterList
+            with writer.element("parameterList"):
+                # Recipe
+                if self._recipe is not None:
+                    writer.leaf("recipe", self._recipe)
+
+                # Helper
+                if self._helper is not None:
+                    writer.leaf("helper", self._helper)
+
+                #  Write the parameters
+                for parameter in self._parameters:
+                    parameter.writeXML(writer)
+
+                #  Write the variables
+                for variable in self._variables:
+                    variable.writeXML(writer)
 
     def setRecipe(self, recipe):
         self._recipe = recipe
@@ -475,23 +501,20 @@ class Entry():
                 return instrument
         return None
 
-    def writeXML(self, doc, parent):
+    def writeXML(self, writer):
         """generates the xml for the entry"""
-        entry=doc.createElement("entry")
-        entry.setAttribute("name", self._name)
-        parent.appendChild(entry)
-        
-        # Monitors
-        for i in range(len(self._monitors)):
-            self._monitors[i].writeXML(doc,entry)
-         
-        # Samples
-        for i in range(len(self._samples)):
-            self._samples[i].writeXML(doc,entry) 
-        
-        # Instruments
-        for i in range(len(self._instruments)):
-            self._instruments[i].writeXML(doc, entry)
+        with writer.element("entry", {"name":self._name}):
+            # Monitors
+            for monitor in self._monitors:
+                monitor.writeXML(writer)
+
+            # Samples
+            for sample in self._samples:
+                sample.writeXML(writer)
+
+            # Instruments
+            for instrument in self._instruments:
+                instrument.writeXML(writer)
         
 
 class Geometry():
@@ -535,47 +558,43 @@ class Geometry():
         """Adds a maths section to the instrument geometry"""
         self._math = math
     
-    def generateXML(self):
-        doc=xml.dom.minidom.Document()
-        instrumentgeometry=doc.createElementNS("http://neutrons.ornl.gov/SNS/ASG/GeometryInput", "instrumentgeometry")
-        doc.appendChild(instrumentgeometry)
-
-        version=doc.createElement("version")        
-        today = date.today()
-        version.appendChild(doc.createTextNode("%04i-%02i-%02i" % (today.year,today.month,today.day)))
-        instrumentgeometry.appendChild(version)
-
-        # Generate the XML for all entry(s)
-        for i in range(len(self._entries)):
-            self._entries[i].writeXML(doc, instrumentgeometry)
-    
-        # Recipes 
-        if (len(self._recipies) > 0):
-            instrumentgeometry.appendChild(doc.createComment(" RECIPES "))
-            recipes = doc.createElement("recipes")
-            instrumentgeometry.appendChild(recipes)
-            for i in range(len(self._recipies)):
-                self._recipies[i].writeXML(doc, recipes)
-            
-        # Math Section
-        if self._math is not None:
-            self._math.writeXML(doc, instrumentgeometry)
-                
-        return doc
+    def generateXML(self, output):
+        """Write the XML to a filename or file object one element at a time"""
+        with le.xmlfile(output, encoding="utf-8") as xf:
+            xf.write_declaration()
+            writer = XmlWriter(xf)
+            # minidom never wrote the namespace of the root element
+            with writer.element("instrumentgeometry"):
+                today = date.today()
+                writer.leaf("version", "%04i-%02i-%02i" % (today.year,today.month,today.day))
+
+                # Generate the XML for all entry(s)
+                for entry in self._entries:
+                    entry.writeXML(writer)
+
+                # Recipes
+                if (len(self._recipies) > 0):
+                    writer.comment(" RECIPES ")
+                    with writer.element("recipes"):
+                        for recipe in self._recipies:
+                            recipe.writeXML(writer)
+
+                # Math Section
+                if self._math is not None:
+                    self._math.writeXML(writer)
     
     def validateXML(self):
         """validates the xml against the geometry input schema"""
     
     def writeToScreen(self):
         """Prints the generated XML to the screen"""
-        self.generateXML().toprettyxml()
-        
+        self.generateXML(getattr(sys.stdout, "buffer", sys.stdout))
+
     def writeToFile(self):
         """Writes the XML to a file with the prescriptive name"""
         today = date.today()
         filename = "%s_geom_%4i_%02i_%02i.xml" % (self._name,today.year,today.month,today.day)
-        f1=open(filename, "w")
-        f1.write(self.generateXML().toprettyxml())
+        self.generateXML(filename)
 
 def generateGeom(instrument):
     """Returns a geometry is an instrument containing a source and
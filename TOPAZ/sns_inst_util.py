@@ -1,15 +1,27 @@
 #!/usr/bin/env python
 
 from finders_version import version as __version__
+import os
+import sys
+try:
+    from run_ranges import RunSet
+except ImportError:
+    # run_ranges.py is at the top of the repository. Load it from there
+    # rather than putting that directory on sys.path for every importer.
+    import imp
+    RunSet = imp.load_source("run_ranges", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        os.pardir, "run_ranges.py")).RunSet
 
 XML_FILE = "./instrumentlist.xml"
 INSTRUMENTS = []
 
+# parsed instrument lists keyed by absolute filename
+__CACHE = {}
+
 def getNodeValue(node):
-    for child in node.childNodes:
-        if child.nodeValue is not None:
-            return str(child.nodeValue)
-    raise Exception("Failed to find value of node \"%s\"" % node.nodeName)
+    if node.text is not None and len(node.text.strip()) > 0:
+        return str(node.text.strip())
+    raise Exception("Failed to find value of node \"%s\"" % node.tag)
 
 ########## DEFINE THE INSTRUMENT CLASS
 class Instrument:
@@ -21,8 +33,8 @@ class Instrument:
         self.longname = None
         self.beamline = None
         self.computers = []
-        for child in instrumentNode.childNodes:
-            name = child.nodeName
+        for child in instrumentNode:
+            name = child.tag
             if name == "shortname":
                 self.shortname = getNodeValue(child)
             elif name == "longname":
@@ -39,37 +51,64 @@ class Instrument:
                 return True
         return False
 
-########## DYNAMICALLY LOAD THE ENUMERATIONS
+########## LOAD THE ENUMERATIONS
+def parseInstruments(filename):
+    """Parse an instrument list file into a list of Instrument"""
+    try:
+        from xml.etree import cElementTree as ElementTree
+    except ImportError:
+        from xml.etree import ElementTree
+    root = ElementTree.parse(filename).getroot()
+
+    instruments = []
+    for facilityNode in root.iter("facility"):
+        name = facilityNode.findtext("name")
+        if name is not None:
+            name = name.strip()
+        for child in facilityNode.findall("instrument"):
+            instruments.append(Instrument(name, child))
+    return instruments
+
+def loadInstruments(filename=XML_FILE):
+    """Return (instruments, byName) for an instrument list file where byName
+    maps the short name to the Instrument. The file is parsed
+    once per process and again only when its modification time changes."""
+    path = os.path.abspath(filename)
+    mtime = os.path.getmtime(path)
+    entry = __CACHE.get(path)
+    if entry is None or entry[0] != mtime:
+        instruments = parseInstruments(path)
+        byName = {}
+        for instrument in instruments:
+            byName.setdefault(instrument.shortname, instrument)  # first one wins
+        entry = (mtime, instruments, byName)
+        __CACHE[path] = entry
+    return entry[1], entry[2]
+
 def __init__():
-    from xml.dom.minidom import parse
     try:
-        dom = parse(XML_FILE)
-    except IOError, e:
+        instruments = loadInstruments(XML_FILE)[0]
+    except (IOError, OSError), e:
         print "IOError: Failed to read configuration file:", e
         import sys
         sys.exit(-1)
-    facilitiesNode = None
-    for child in dom.childNodes:
-        if child.nodeName == "facilities":
-            facilitiesNode = child
-
-    def processFacility(facilityNode):
-        name = None
-        # get the facility name
-        for child in facilityNode.childNodes:
-            if child.nodeName == "name":
-                name = getNodeValue(child)
-
-        # process the instruments
-        for child in facilityNode.childNodes:
-            if child.nodeName == "instrument":
-                INSTRUMENTS.append(Instrument(name, child))
-
-    for child in facilitiesNode.childNodes:
-        if child.nodeName == "facility":
-            processFacility(child)
+    INSTRUMENTS[:] = instruments
 __init__()
 
+def getInstruments():
+    """The instruments in XML_FILE, parsed again if the file has changed"""
+    try:
+        instruments, byName = loadInstruments(XML_FILE)
+    except (IOError, OSError):
+        # keep what was read before if the file went away
+        byName = {}
+        for instrument in INSTRUMENTS:
+            byName.setdefault(instrument.shortname, instrument)
+        return byName
+    if INSTRUMENTS != instruments:
+        INSTRUMENTS[:] = instruments
+    return byName
+
 ########## HERE IS THE LIBRARY
 def getMachine():
     """Determine the name of the machine this process is running on."""
@@ -83,11 +122,11 @@ def getInstrument(inst=None, options=None):
         return inst
     except AttributeError:
         pass
+    byName = getInstruments()
     if inst is not None and len(inst) > 0:
-        name = inst.upper()
-        for instrument in INSTRUMENTS:
-            if instrument.shortname == name:
-                return instrument
+        instrument = byName.get(inst.upper())
+        if instrument is not None:
+            return instrument
     host = getMachine()
     # check each instrument
     for instrument in INSTRUMENTS:
@@ -206,26 +245,12 @@ def getConcurrentIndices(runs, startIndex=0):
 
 def condenseList(runs):
     """Turn a list of integers into a condensed string version of the list"""
-    result = []
-    (start, stop) = (0,0)
-    length = len(runs)
-    while stop < length:
-        (start, stop) = getConcurrentIndices(runs, start)
-        if stop >= length:
-            break
-        if start < stop:
-            result.append("%s-%s" % (runs[start], runs[stop]))
-        else:
-            result.append(runs[start])
-        start = stop+1
-
-    # convert the remaining runs into strings
-    result = map(lambda x: str(x), result)
-
-    return ",".join(result)
+    return str(RunSet.fromRuns(runs))
 
 def generateList(args, options=None):
-    """Convert a string list into a list of integers
+    """Convert a string list into a list of integers. Use
+    run_ranges.RunSet.parse directly to keep the ranges without expanding
+    them.
     
     args = single string or list of strings in the form
         '\d+(-\d+)?(,\d+(-\d+)?)*'
@@ -247,37 +272,9 @@ def generateList(args, options=None):
     if len(args) <= 0:
         raise RuntimeError("Cannot generate list from empty")
     verbose = getattr(options, 'verbose', False);
-    # normalize args to always be a list
-    if (not isinstance(args, list)):
-        args = [args]
-    # args should be a list of strings like this:
-    # ['1-5,10', '12,15-21'].
-    # force all elements to be strings and split on commas
-    args = [str(a).split(',') for a in args]
-    # args should now be a list of lists like this:
-    # [['1-5', '10'], ['12', '15-21']]
-    # flatten the list back out again
-    from operator import add # function equivalent of +
-    args = reduce(add, args)
-    # args should now be a list of strings again like this:
-    # ['1-5', '10', '12', '15-21']
-    # use a set instead of a list so overlapping ranges won't create
-    # duplicate integers in the output
-    result = set()
-    for a in args:
-        # watch for badly formatted input ranges
-        # Mainly I expect the int() cast below to fail for bad input.
-        try:
-            ends = [int(x) for x in a.split('-')]
-            if (len(ends) > 2):
-                raise ValueError, "too many dashes"
-            # reverse any backwards ranges
-            ends.sort();
-            result |= set(xrange(ends[0], ends[-1] + 1))
-        except:
-            if verbose:
-                print "WARN: Skipping range \"%s\"" % a
-    return sorted(result)
+    # the ranges are merged symbolically so overlapping ranges won't
+    # create duplicate integers and only the result is expanded
+    return RunSet.parse(args, verbose).runs()
 
 ########## MAIN FUNCTION FOR TESTING
 if __name__ == "__main__":
@@ -17,12 +17,13 @@ TUBE_THICKNESS = ("tube_thickness", 0.0008, "metre")
 TUBE_TEMPERATURE = ("tube_temperature", 290.0, "K")
 
 def convert(value):
-    return float(value) / CONVERT_TO_METERS
+    return value / CONVERT_TO_METERS
 
 if __name__ == "__main__":
     import sys
     from helper import MantidGeom
-    from sns_ncolumn import readFile
+    from sns_ncolumn import readColumns
+    from run_ranges import RunRangeIndex
 
 
 
@@ -31,6 +32,9 @@ if __name__ == "__main__":
         geom_input_file = sys.argv[1]
     except IndexError:
         geom_input_file = "SNS/CNCS/CNCS_geom_2017B.txt"
+    if geom_input_file.isdigit():
+        # a run number selects the geometry file that is valid for it
+        geom_input_file = RunRangeIndex.fromDirectory("SNS/CNCS", "CNCS_geom_").find(int(geom_input_file))
         
     # Set header information
     comment = "Created by Andrei Savici"
@@ -39,8 +43,13 @@ if __name__ == "__main__":
 
     # Get geometry information file
     inst_name = "CNCS"
-    detinfo = readFile(geom_input_file)
-    num_dets = len(detinfo.values()[0])
+    detinfo = readColumns(geom_input_file,
+                          dtypes={"Bank_xpos": float, "Bank_ypos": float, "Bank_zpos": float})
+    num_dets = detinfo["BankAngle"].size
+    roty = detinfo["BankAngle"] + FLIPY
+    xpos = convert(detinfo["Bank_xpos"])
+    ypos = convert(detinfo["Bank_ypos"])
+    zpos = convert(detinfo["Bank_zpos"])
     xml_outfile = inst_name+"_Definition.xml"
  
     det = MantidGeom(inst_name, comment=comment, valid_from=valid_from)
@@ -57,12 +66,8 @@ if __name__ == "__main__":
     doc_handle = det.makeTypeElement(label)
     for i in range(num_dets):
         detname = BANKFMT % (i+1)
-        roty = float(detinfo["BankAngle"][i]) + FLIPY
-        xpos = convert(detinfo["Bank_xpos"][i])
-        ypos = convert(detinfo["Bank_ypos"][i])
-        zpos = convert(detinfo["Bank_zpos"][i])
         det.addComponent(detname, root=doc_handle)
-        det.addDetector(xpos, ypos, zpos, ROTX, roty, ROTZ, detname, "eightpack")
+        det.addDetector(xpos[i], ypos[i], zpos[i], ROTX, roty[i], ROTZ, detname, "eightpack")
 
     det.addComment("STANDARD 8-PACK")
     det.addNPack("eightpack", NUM_TUBES_PER_BANK, TUBE_WIDTH, AIR_GAP_WIDTH)
@@ -14,12 +14,12 @@ TUBE_THICKNESS = ("tube_thickness", 0.0005, "metre")
 TUBE_TEMPERATURE = ("tube_temperature", 290.0, "K")
 
 def convert(value):
-    return float(value) / CONVERT_TO_METERS
+    return value / CONVERT_TO_METERS
 
 if __name__ == "__main__":
     import sys
     from helper import MantidGeom
-    from sns_ncolumn import readFile
+    from sns_ncolumn import readColumns
 
     try:
         geom_input_file = sys.argv[1]
@@ -32,8 +32,14 @@ if __name__ == "__main__":
     valid_from = "2017-04-04 00:00:00"
 
     # Get geometry information file
-    detinfo = readFile(geom_input_file)
-    num_dets = len(detinfo.values()[0])
+    detinfo = readColumns(geom_input_file,
+                          dtypes={"Xsci": float, "Ysci": float, "Zsci": float,
+                                  # rotations are written out verbatim
+                                  "Xrot_sci": str, "Yrot_sci": str, "Zrot_sci": str})
+    num_dets = detinfo["Location"].size
+    xpos = convert(detinfo["Xsci"])
+    ypos = convert(detinfo["Ysci"])
+    zpos = convert(detinfo["Zsci"])
     xml_outfile = INST_NAME+"_Definition.xml"
     
     det = MantidGeom(INST_NAME, comment=comment, valid_from=valid_from)
@@ -77,12 +83,9 @@ if __name__ == "__main__":
 
         det.addComponent("bank"+str(i+1), root=doc_handle)
         
-        xpos = convert(detinfo["Xsci"][i])
-        ypos = convert(detinfo["Ysci"][i])
-        zpos = convert(detinfo["Zsci"][i])
         det_type = "sixteenpack"
         
-        det.addDetector(xpos, ypos, zpos, 
+        det.addDetector(xpos[i], ypos[i], zpos[i], 
                         detinfo["Xrot_sci"][i], detinfo["Yrot_sci"][i], detinfo["Zrot_sci"][i],
                         "bank"+str(i+1), det_type)
 
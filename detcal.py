@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Reader for ISAW .DetCal files. The whole file is read in one pass: the
+L1/T0 line is kept and every bank line goes into a single structured array
+so per-bank quantities can be computed on whole columns at once.
+"""
+from __future__ import print_function
+
+import os
+import numpy as np
+from parse_cache import cached
+
+# columns of the bank (flag 5) lines, lengths are in centimetres
+DETCAL_DTYPE = np.dtype([('DETNUM', int), ('NROWS', int), ('NCOLS', int),
+                         ('WIDTH', float), ('HEIGHT', float), ('DEPTH', float), ('DETD', float),
+                         ('CenterX', float), ('CenterY', float), ('CenterZ', float),
+                         ('BaseX', float), ('BaseY', float), ('BaseZ', float),
+                         ('UpX', float), ('UpY', float), ('UpZ', float)])
+
+
+@cached(version=1)
+def readDetCalColumns(filename):
+    """
+    Parse a DetCal file into plain arrays so the result can be cached.
+    @return dict of "L1" and "T0", NaN if the file does not have them, and
+    one array per field of DETCAL_DTYPE with one entry per bank
+    """
+    if not os.path.exists(filename):
+        raise RuntimeError("File '%s' does not exist" % filename)
+
+    l1, t0 = np.nan, np.nan
+    lines = []
+    with open(filename) as handle:
+        for line in handle:
+            if line.startswith('#'):
+                continue  # comment line
+
+            flag = int(line[0])  # each line has a flag
+            if flag == 4 or flag == 6:
+                pass  # label banks, label on l1/t0_shift
+            elif flag == 5:
+                lines.append(line[1:])
+            elif flag == 7:
+                l1, t0 = [float(value) for value in line[1:].split()]
+            else:
+                raise RuntimeError('Do not know how to deal with flag {}'.format(flag))
+
+    banks = np.loadtxt(lines, dtype=DETCAL_DTYPE, ndmin=1)
+    columns = dict((field, banks[field]) for field in DETCAL_DTYPE.names)
+    columns['L1'] = np.array(l1)
+    columns['T0'] = np.array(t0)
+    return columns
+
+
+def readDetCal(filename):
+    """
+    Read a DetCal file.
+    @return (l1, t0, banks) with l1 in centimetres as in the file, None if
+    the file does not have it, and banks a structured array with the fields
+    of DETCAL_DTYPE, one row per bank
+    """
+    columns = readDetCalColumns(filename)
+    banks = np.empty(columns[DETCAL_DTYPE.names[0]].size, dtype=DETCAL_DTYPE)
+    for field in DETCAL_DTYPE.names:
+        banks[field] = columns[field]
+    l1, t0 = [None if np.isnan(columns[name]) else float(columns[name]) for name in ('L1', 'T0')]
+    return l1, t0, banks
+
+
+def getVectors(banks, prefix):
+    """(N, 3) array of the X, Y, Z columns that start with prefix"""
+    return np.stack([banks[prefix + axis] for axis in ('X', 'Y', 'Z')], axis=1)
+
+
+def stackDetCals(filenames):
+    """
+    Read several DetCal files into one array.
+    @return (l1, t0, detnums, table) with l1 and t0 one value per file,
+    the sorted union of the bank numbers and a (files, banks, fields) float
+    array, fields in the order of DETCAL_DTYPE, that is NaN where a file
+    does not have a bank
+    """
+    calibrations = [readDetCal(filename) for filename in filenames]
+    l1 = np.array([calibration[0] for calibration in calibrations], dtype=float)
+    t0 = np.array([calibration[1] for calibration in calibrations], dtype=float)
+    detnums = np.unique(np.concatenate([calibration[2]['DETNUM']
+                                        for calibration in calibrations]))
+
+    table = np.full((len(calibrations), detnums.size, len(DETCAL_DTYPE.names)), np.nan)
+    for i, (_, _, banks) in enumerate(calibrations):
+        rows = np.searchsorted(detnums, banks['DETNUM'])
+        for j, field in enumerate(DETCAL_DTYPE.names):
+            table[i, rows, j] = banks[field]
+    return l1, t0, detnums, table
+
+
+def getFieldVectors(table, prefix):
+    """(..., 3) array of the X, Y, Z fields of a stacked table that start with prefix"""
+    columns = [DETCAL_DTYPE.names.index(prefix + axis) for axis in ('X', 'Y', 'Z')]
+    return table[..., columns]
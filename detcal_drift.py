@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Compare a series of ISAW DetCal calibrations. All of the files are stacked
+into one (files, banks, fields) array, with NaN for banks that a file does
+not have, and the center shift and rotation of every bank along with the
+change in L1 and T0 is calculated for every pair of files at once.
+"""
+from __future__ import print_function
+
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+from detcal import getFieldVectors, stackDetCals
+from rectangle import pairwiseDrift, writeDriftSummary
+
+DETCAL_FILES = 'SNS/MANDI/*.DetCal'
+
+
+def calcOrientations(table):
+    """
+    Orientation of every bank from the base and up vectors of a stacked table.
+    @return (..., 3, 3) array with the base, up and normal directions as rows,
+    made orthonormal, NaN where the bank is missing
+    """
+    base = getFieldVectors(table, 'Base')
+    up = getFieldVectors(table, 'Up')
+    base = base / np.linalg.norm(base, axis=-1)[..., np.newaxis]
+    normal = np.cross(base, up)
+    normal /= np.linalg.norm(normal, axis=-1)[..., np.newaxis]
+    up = np.cross(normal, base)  # the measured up is not quite perpendicular
+    return np.stack((base, up, normal), axis=-2)
+
+
+def calcDriftMatrix(l1, t0, table):
+    """
+    Changes between every pair of calibrations.
+    @param l1, t0 one value per file as in the files, cm and microseconds
+    @param table (files, banks, fields) array from stackDetCals
+    @return dict of "l1" and "t0" (files, files) changes in metres and
+    microseconds, "shift" (files, files, banks, 3) in metres, "distance"
+    and "angle" (files, files, banks) in metres and degrees. Element [i, j]
+    is the change from file i to file j, NaN where either is missing a bank.
+    """
+    centers = getFieldVectors(table, 'Center') / 100.  # cm to metres
+    drift = pairwiseDrift(centers, calcOrientations(table))
+    drift["l1"] = (l1[np.newaxis, :] - l1[:, np.newaxis]) / 100.
+    drift["t0"] = t0[np.newaxis, :] - t0[:, np.newaxis]
+    return drift
+
+
+def writeSummary(names, detnums, drift, handle):
+    """Write the L1 and T0 change and the largest shift and rotation between
+    each pair of calibrations"""
+    writeDriftSummary(names, detnums, drift, handle,
+                      columns=(("dL1(mm)", 1000. * drift["l1"]), ("dT0(us)", drift["t0"])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a series of DetCal calibrations")
+    parser.add_argument('detcals', nargs='*', help='DetCal files, oldest first (default %s)'
+                        % DETCAL_FILES)
+    parser.add_argument('--output', help='save the full matrix to this .npz file')
+    options = parser.parse_args()
+
+    filenames = options.detcals if options.detcals else sorted(glob.glob(DETCAL_FILES))
+    names = [os.path.splitext(os.path.basename(filename))[0] for filename in filenames]
+    l1, t0, detnums, table = stackDetCals(filenames)
+    drift = calcDriftMatrix(l1, t0, table)
+
+    writeSummary(names, detnums, drift, sys.stdout)
+    if options.output:
+        np.savez(options.output, files=np.array(names), banks=detnums, **drift)
+        print('wrote', options.output)
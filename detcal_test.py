@@ -0,0 +1,77 @@
+#!/bin/env python
+from detcal import getFieldVectors, getVectors, readDetCal, stackDetCals
+import numpy as np
+import os
+import parse_cache
+import shutil
+import tempfile
+import unittest
+
+DETCAL = "\n".join([
+    "# comment",
+    "6         L1     T0_SHIFT",
+    "7  3003.6737       -6.711",
+    "4 DETNUM  NROWS  NCOLS    WIDTH   HEIGHT   DEPTH   DETD   CenterX   CenterY   CenterZ"
+    "    BaseX    BaseY    BaseZ      UpX      UpY      UpZ",
+    "5      1    256    256  15.8976  15.8208  0.2000  40.95   -2.0395  -37.8010   15.6048"
+    " -0.99935  0.03224 -0.01621 -0.00157  0.40955  0.91228",
+    "5      3    256    128  15.8208  15.8208  0.2000  40.94   14.8487  -38.1313   -1.1952"
+    " -0.00749  0.00076  0.99997  0.95277  0.30362  0.00690",
+    ""])
+
+
+class TestReadDetCal(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".DetCal")
+        with os.fdopen(handle, "w") as handle:
+            handle.write(DETCAL)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def testRead(self):
+        l1, t0, banks = readDetCal(self.filename)
+        self.assertEqual((l1, t0), (3003.6737, -6.711))
+        self.assertEqual(banks['DETNUM'].tolist(), [1, 3])
+        self.assertEqual(banks['NCOLS'].tolist(), [256, 128])
+        np.testing.assert_equal(getVectors(banks, 'Center'),
+                                [[-2.0395, -37.8010, 15.6048], [14.8487, -38.1313, -1.1952]])
+
+    def testStack(self):
+        other = self.filename + ".other"
+        with open(other, "w") as handle:
+            handle.write(DETCAL.replace("5      3 ", "5      2 "))
+        try:
+            l1, t0, detnums, table = stackDetCals([self.filename, other])
+        finally:
+            os.remove(other)
+        self.assertEqual(l1.tolist(), [3003.6737, 3003.6737])
+        self.assertEqual(detnums.tolist(), [1, 2, 3])
+        self.assertEqual(table.shape, (2, 3, 16))
+        self.assertTrue(np.all(np.isnan(table[0, 1])))
+        self.assertTrue(np.all(np.isnan(table[1, 2])))
+        np.testing.assert_equal(getFieldVectors(table, 'Center')[:, 0],
+                                [[-2.0395, -37.8010, 15.6048]] * 2)
+        self.assertEqual((table[0, 2, 0], table[1, 1, 0]), (3, 2))
+        np.testing.assert_equal(table[0, 2, 1:], table[1, 1, 1:])
+
+    def testCached(self):
+        cachedir = tempfile.mkdtemp()
+        os.environ[parse_cache.CACHE_ENV] = cachedir
+        try:
+            first = readDetCal(self.filename)
+            self.assertEqual(len(os.listdir(cachedir)), 1)
+            second = readDetCal(self.filename)
+        finally:
+            del os.environ[parse_cache.CACHE_ENV]
+            shutil.rmtree(cachedir)
+        self.assertEqual(second[:2], (3003.6737, -6.711))
+        self.assertEqual(second[2].dtype, first[2].dtype)
+        self.assertEqual(second[2].tolist(), first[2].tolist())
+
+    def testMissing(self):
+        self.assertRaises(RuntimeError, readDetCal, self.filename + ".missing")
+
+
+if __name__ == "__main__":
+    unittest.main(module="detcal_test", verbosity=2)
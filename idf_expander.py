@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Expand an instrument definition file into absolute detector positions
+without Mantid. Every type is resolved once into an (N, 3) array of its
+detector positions in its own frame, and each placement of it is applied as
+one rotation and translation of the whole array.
+
+Only the parts of the IDF that the generators in this repository write for
+tube instruments are supported: <location> with cartesian x, y, z, a "rot"
+attribute and nested <rot> elements. As in Mantid, a nested <rot> turns
+about the axes left by the rotations outside it.
+"""
+from __future__ import print_function
+
+import numpy as np
+from lxml import etree as le  # python-lxml on rpm based systems
+from rectangle import Vector, generateRotation
+
+
+def localname(element):
+    """Tag of the element without the namespace"""
+    return le.QName(element).localname
+
+
+def getRotation(element, degrees=True):
+    """Rotation matrix for the "val" and "axis-[xyz]" attributes of an element"""
+    axis = Vector(float(element.get('axis-x', 0.)),
+                  float(element.get('axis-y', 0.)),
+                  float(element.get('axis-z', 1.)))
+    angle = float(element.get('val', element.get('rot', 0.)))
+    if degrees:
+        angle = np.radians(angle)
+    return np.asarray(generateRotation(axis, angle))
+
+
+def getTransform(location, degrees=True):
+    """
+    Translation vector and rotation matrix of a <location> element
+    """
+    for attr in ('r', 't', 'p', 'ang'):
+        if attr in location.attrib:
+            raise RuntimeError("Only cartesian locations are supported (found '%s')" % attr)
+    translation = np.array([float(location.get(attr, 0.)) for attr in ('x', 'y', 'z')])
+
+    rotation = np.identity(3)
+    if 'rot' in location.attrib:
+        rotation = getRotation(location, degrees)
+    element = location
+    while True:
+        children = [child for child in element if localname(child) in ('rot', 'trans')]
+        if len(children) <= 0:
+            break
+        element = children[0]
+        if localname(element) == 'trans':
+            raise RuntimeError('<trans> elements are not supported')
+        # the nested rotation is about the already rotated axes
+        rotation = np.dot(rotation, getRotation(element, degrees))
+    return translation, rotation
+
+
+class IdfExpander:
+    """
+    Detector positions and ids of an instrument definition file.
+    """
+    def __init__(self, filename):
+        self.__root = le.parse(filename).getroot()
+        self.__degrees = True
+        for element in self.__root:
+            if not isinstance(element.tag, str):
+                continue  # comments
+            if localname(element) == 'defaults':
+                for angle in element.iter('{*}angle'):
+                    self.__degrees = angle.get('unit', 'degree') != 'radian'
+
+        self.__types = {}
+        self.__components = []  # top level (component, location) pairs
+        self.__idlists = {}
+        for element in self.__root:
+            if not isinstance(element.tag, str):
+                continue
+            name = localname(element)
+            if name == 'type':
+                self.__types[element.get('name')] = element
+            elif name == 'component':
+                self.__components.append(element)
+            elif name == 'idlist':
+                self.__idlists[element.get('idname')] = element
+
+        self.__cache = {}
+
+    def __typePositions(self, type_name):
+        """(N, 3) detector positions of a type in its own frame"""
+        if type_name in self.__cache:
+            return self.__cache[type_name]
+
+        type_element = self.__types.get(type_name)
+        if type_element is None:
+            raise RuntimeError("Type '%s' is not defined" % type_name)
+        kind = type_element.get('is', '').lower()
+        if kind == 'detector':
+            positions = np.zeros((1, 3))
+        elif kind in ('rectangulardetector', 'rectangular_detector', 'structureddetector'):
+            raise RuntimeError("Type '%s' is a '%s' which is not supported" % (type_name, kind))
+        else:
+            positions = [self.__placeComponent(component)
+                         for component in type_element if isinstance(component.tag, str)
+                         and localname(component) == 'component']
+            positions = np.concatenate(positions) if positions else np.zeros((0, 3))
+        self.__cache[type_name] = positions
+        return positions
+
+    def __placeComponent(self, component):
+        """Detector positions of every location of a component in its parent's frame"""
+        child = self.__typePositions(component.get('type'))
+        positions = []
+        for location in component:
+            if not isinstance(location.tag, str):
+                continue
+            name = localname(location)
+            if name == 'locations':
+                raise RuntimeError('<locations> elements are not supported')
+            if name != 'location':
+                continue
+            translation, rotation = getTransform(location, self.__degrees)
+            positions.append(np.dot(child, rotation.T) + translation)
+        return np.concatenate(positions) if positions else np.zeros((0, 3))
+
+    def detectorPositions(self, type_name):
+        """
+        Absolute positions of the detectors in a top level component, in the
+        order Mantid assigns them ids.
+        @return (N, 3) array
+        """
+        for component in self.__components:
+            if component.get('type') == type_name:
+                return self.__placeComponent(component)
+        raise RuntimeError("No top level component of type '%s'" % type_name)
+
+    def detectorIds(self, idlist_name):
+        """Expanded list of ids in an <idlist>"""
+        idlist = self.__idlists.get(idlist_name)
+        if idlist is None:
+            raise RuntimeError("No idlist named '%s'" % idlist_name)
+        ids = []
+        for element in idlist.iter('{*}id'):
+            if 'val' in element.attrib:
+                ids.append(np.array([int(element.get('val'))]))
+            else:
+                ids.append(np.arange(int(element.get('start')), int(element.get('end')) + 1,
+                                     int(element.get('step', 1))))
+        return np.concatenate(ids)
+
+
+if __name__ == "__main__":
+    import sys
+    idf = IdfExpander(sys.argv[1])
+    for type_name in sys.argv[2:]:
+        positions = idf.detectorPositions(type_name)
+        print(type_name, positions.shape[0], 'detectors centered at', positions.mean(axis=0))
@@ -0,0 +1,65 @@
+#!/bin/env python
+from idf_expander import IdfExpander
+import numpy as np
+import os
+import tempfile
+import unittest
+
+IDF = """<?xml version='1.0' encoding='ASCII'?>
+<instrument xmlns="http://www.mantidproject.org/IDF/1.0" name="TEST">
+  <defaults>
+    <angle unit="degree"/>
+  </defaults>
+  <component type="bank" idlist="bank">
+    <location x="1.0" z="2.0" rot="90" axis-x="0" axis-y="1" axis-z="0">
+      <rot val="90" axis-x="1" axis-y="0" axis-z="0"/>
+    </location>
+  </component>
+  <type name="bank">
+    <component type="tube">
+      <location x="-0.1"/>
+      <location x="0.1"/>
+    </component>
+  </type>
+  <type name="tube" outline="yes">
+    <component type="pixel">
+      <location y="-0.5"/>
+      <location y="0.5"/>
+    </component>
+  </type>
+  <type name="pixel" is="detector"/>
+  <idlist idname="bank">
+    <id start="10" end="11"/>
+    <id val="20"/>
+    <id start="30" end="34" step="4"/>
+  </idlist>
+</instrument>
+"""
+
+
+class TestIdfExpander(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".xml")
+        with os.fdopen(handle, "w") as handle:
+            handle.write(IDF)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def testPositions(self):
+        idf = IdfExpander(self.filename)
+        # y of the pixels becomes z after the nested rotation about x,
+        # then x after the outer rotation about y, which also takes x to -z
+        expected = [[0.5, 0.0, 2.1], [1.5, 0.0, 2.1],
+                    [0.5, 0.0, 1.9], [1.5, 0.0, 1.9]]
+        np.testing.assert_almost_equal(idf.detectorPositions("bank"), expected)
+        self.assertRaises(RuntimeError, idf.detectorPositions, "tube")
+
+    def testIds(self):
+        idf = IdfExpander(self.filename)
+        self.assertEqual(idf.detectorIds("bank").tolist(), [10, 11, 20, 30, 34])
+        self.assertRaises(RuntimeError, idf.detectorIds, "missing")
+
+
+if __name__ == "__main__":
+    unittest.main(module="idf_expander_test", verbosity=2)
@@ -1,91 +1,57 @@
 #!/usr/bin/env python
 from helper import MantidGeom
-import numpy as np
-import os
-from rectangle import Vector, getEuler, makeLocation
+from detcal import getVectors, readDetCal
+from rectangle import getEulers, makeLocation
 
 
-class DetCalBank():
-    '''Class that holds the information for a single panel/line of the detcal file'''
-    def __init__(self, *args):
-        if len(args) != 16:
-            raise RuntimeError('Expeceted 16 args found {}'.format(len(args)))
+class DetCal():
+    '''Class holding information for a whole ISAW detcal file. Every quantity
+    is an array with one entry per bank'''
+    def __init__(self, filename):
+        l1, self.t0, banks = readDetCal(filename)
+        self.l1 = l1 / 100.  # from cm to meters
 
-        self.det_num = int(args[0])
+        self.det_num = banks['DETNUM']
         self.first_pixel = 256 * 256 * self.det_num
+        self.nrows = banks['NROWS']
+        self.ncols = banks['NCOLS']
 
-        self.nrows = int(args[1])
-        self.ncols = int(args[2])
-
-        # must get values before the rest ar converted to meters
-        base_vector = Vector(args[10:13])  # 10, 11, 12
-        up_vector = Vector(args[13:16])    # 13, 14, 15
-
-        # convert everything else to floats in meeters
-        args = np.array(args, dtype=np.float) / 100.
-
-        self._calc_panel_size(width=args[3], height=args[4])
-
-        # skip args[5] which is the depth and not apparently used
-        # skip args[6] with is the length of the center vector
-        self.center = Vector(args[7:10])        # 7, 8, 9
-        self._calc_panel_pos_and_orient(base_vector, up_vector)
-
-    def _calc_panel_size(self, width, height):
+        # convert everything else to meters
+        width = banks['WIDTH'] / 100.
+        height = banks['HEIGHT'] / 100.
         self.deltaX = width / self.nrows
         self.startX = 0.5 * (self.deltaX - width)
-
         self.deltaY = height / self.ncols
         self.startY = 0.5 * (self.deltaY - height)
 
-    def _calc_panel_pos_and_orient(self, base_vector, up_vector):
-        # all of these angles are in radians
-        phi, chi, omega = [item for item in getEuler(base_vector, up_vector, degrees=True)]
-        # need the angle and what it is rotated around
-        self.rotations = [(omega, [0, 1, 0]),
-                          (chi, [0, 0, 1]),
-                          (phi, [0, 1, 0])]
-
-    def addToXml(self, instr):
-        type_name = 'panel{}'.format(self.det_num)
-        instr.addComment(type_name)  # make it easier to read the xml
+        # skip the depth and the length of the center vector which are not apparently used
+        self.center = getVectors(banks, 'Center') / 100.
 
-        # write out the component/shape of the overall detector
-        instr.addRectangularDetector(name=type_name, type='pixel',
-                                     xpixels=self.nrows, xstart=self.startX, xstep=self.deltaX,
-                                     ypixels=self.ncols, ystart=self.startY, ystep=self.deltaY)
+        # euler angles of every bank from the base and up vectors
+        self.angles = getEulers(getVectors(banks, 'Base'), getVectors(banks, 'Up'), degrees=True)
 
-        # write out the detector position
-        extra_attrs = {"idstart": self.first_pixel, 'idfillbyfirst': 'y', 'idstepbyrow': self.ncols}
-        det = instr.makeDetectorElement(type_name, extra_attrs=extra_attrs)
-        makeLocation(instr, det, 'bank{}'.format(self.det_num), self.center, self.rotations)
-
-
-class DetCal():
-    '''Class holding information for a whole ISAW detcal file'''
-    def __init__(self, filename):
-        if not os.path.exists(filename):
-            raise RuntimeError("File '%s' does not exist" % filename)
-
-        self.banks = []  # list of banks
-
-        with open(filename) as handle:
-            for line in handle:
-                if line.startswith('#'):
-                    continue  # comment line
-
-                flag = int(line[0])  # each line has a flag
-                line = line[1:].strip().split()
-
-                if flag == 4 or flag == 6:
-                    pass  # label banks, label on l1/t0_shift
-                elif flag == 5:
-                    self.banks.append(DetCalBank(*line))
-                elif flag == 7:
-                    self.l1, self.t0 = [float(value) for value in line]
-                    self.l1 /= 100.  # from cm to meters
-                else:
-                    raise RuntimeError(f'Do not know how to deal with flag {flag}')
+    def addToXml(self, instr):
+        for i in range(self.det_num.size):
+            type_name = 'panel{}'.format(self.det_num[i])
+            instr.addComment(type_name)  # make it easier to read the xml
+
+            # write out the component/shape of the overall detector
+            instr.addRectangularDetector(name=type_name, type='pixel',
+                                         xpixels=self.nrows[i], xstart=self.startX[i],
+                                         xstep=self.deltaX[i],
+                                         ypixels=self.ncols[i], ystart=self.startY[i],
+                                         ystep=self.deltaY[i])
+
+            # write out the detector position
+            extra_attrs = {"idstart": self.first_pixel[i], 'idfillbyfirst': 'y',
+                           'idstepbyrow': self.ncols[i]}
+            det = instr.makeDetectorElement(type_name, extra_attrs=extra_attrs)
+            # need the angle and what it is rotated around
+            phi, chi, omega = self.angles[i]
+            rotations = [(omega, [0, 1, 0]),
+                         (chi, [0, 0, 1]),
+                         (phi, [0, 1, 0])]
+            makeLocation(instr, det, 'bank{}'.format(self.det_num[i]), self.center[i], rotations)
 
 
 parameters_template = '''<?xml version='1.0' encoding='UTF-8'?>
@@ -197,8 +163,7 @@ if __name__ == '__main__':
     instr.addMonitors(distance=[-2.935, -0.898, 1.042], names=["monitor1", 'monitor2', 'monitor3'])
 
     # add banks here
-    for bank in detcal.banks:
-        bank.addToXml(instr)
+    detcal.addToXml(instr)
 
     # shape for detector pixels - ignored by required
     instr.addComment(' Pixel for Detectors')
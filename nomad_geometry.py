@@ -7,7 +7,7 @@ from rectangle import Rectangle, Vector
 from lxml import etree as le # python-lxml on rpm based systems
 from math import cos, sin, radians, pi
 import numpy as np
-from sns_ncolumn import readFile
+from sns_ncolumn import readColumns
 
 # All of the tubes are 40" long with a 2mm gap between tubes
 TUBE_LENGTH = 40. * INCH_TO_METRE # 1m long matches better in bank4
@@ -44,54 +44,135 @@ def getCornersSpecial(banknum):
     corners = [tube0 + 0, tube0 + 58, tube15 + 58, tube15 + 0]
     return corners
 
-def getRectangle(bank_num, positions, corners, tolerance_len=0.006):
+# permutations of the corners returned by getCorners
+SWAP = [1, 0, 3, 2]
+FLIPX = [3, 2, 1, 0]
+FLIPY = [2, 3, 0, 1]
+
+NUM_BANKS = [14, 23, 14, 12, 18, 18]
+SPECIAL = [72, 73, 90, 91]
+# Panels 92,93 were moved into backscattering (pixel numbers reassigned),
+# then 94,95,96 were slid over without reassigning pixles. This dictionary
+# handles shuffling those around and should be removed for the next run
+# cycle
+SHUFFLED = {94:92, 95:93, 96:94, 92:95, 93:96}
+
+def getBankCorners(num_banks=NUM_BANKS):
+    """
+    Corner pixel ids for every bank in the order the rectangle expects them.
+    Row i of the (banks, 4) array is for bank i+1.
+    """
+    corners = []
+    bank_num = 0
+    for group, num_banks_in_pack in enumerate(num_banks):
+        for i in range(num_banks_in_pack):
+            bank_num += 1
+            if bank_num in SPECIAL:
+                bank_corners = np.array(getCornersSpecial(bank_num))
+            else:
+                bank_corners = np.array(getCorners(SHUFFLED.get(bank_num, bank_num)))
+
+            if group == 1:
+                # appears to be backwards!!!!!!!!!!!!!!!!
+                bank_corners = bank_corners[SWAP]
+            elif group == 5 and bank_num == 91:
+                # corners are mixed up
+                bank_corners = bank_corners[FLIPX]
+            elif group >= 4:
+                # groups 5 and 6 are upside down
+                bank_corners = bank_corners[FLIPY]
+            corners.append(bank_corners)
+    return np.array(corners)
+
+def getRectangle(bank_num, points, tolerance_len=0.006):
+    """
+    Create the rectangle for a bank from the (4, 3) array of its corner positions.
+    """
     # TODO for some reason tolerance is bigger than the default
     try:
-        one = positions[corners[0]]
-        two = positions[corners[1]]
-        three = positions[corners[2]]
-        four = positions[corners[3]]
         if bank_num in (90,91):
+            points = points.copy()
             if bank_num == 90: # .046875 -> 0.148
-                y_offset = 0.10113
+                points[:, 1] += 0.10113
             elif bank_num == 91: # -.0390625 -> -0.148
-                y_offset = -0.1089375
-            one = Vector(one.x, one.y+y_offset, one.z)
-            two = Vector(two.x, two.y+y_offset, two.z)
-            three = Vector(three.x, three.y+y_offset, three.z)
-            four = Vector(four.x, four.y+y_offset, four.z)
-        return Rectangle(one, two, three, four, tolerance_len=tolerance_len)
+                points[:, 1] += -0.1089375
+        return Rectangle(points[0], points[1], points[2], points[3], tolerance_len=tolerance_len)
     except RuntimeError as e:
-        print('bank', bank_num, corners)
+        print('bank', bank_num, points)
         raise e
 
-def readEngineeringPositions(filename):
-    positions = readFile(filename, hasLabels=False)
+class PixelPositions:
+    """
+    Pixel positions stored as an array of ids sorted in increasing order and
+    the matching (N, 3) array of positions. Indexing with an id or an array of
+    ids returns the positions in one operation.
+    """
+    def __init__(self, ids, xyz):
+        ids = np.asarray(ids, dtype=int)
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        if ids.size != xyz.shape[0]:
+            raise RuntimeError("Found %d ids and %d positions" % (ids.size, xyz.shape[0]))
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.xyz = xyz[order]
+
+    def __len__(self):
+        return self.ids.size
+
+    def __search(self, ids):
+        """Position of each id in the arrays and whether it is present there"""
+        ids = np.asarray(ids, dtype=int)
+        index = np.searchsorted(self.ids, ids.ravel())
+        index[index >= self.ids.size] = 0
+        found = self.ids[index] == ids.ravel()
+        return index.reshape(ids.shape), found.reshape(ids.shape)
+
+    def index(self, ids):
+        """Index into the arrays for the requested ids"""
+        index, found = self.__search(ids)
+        if not np.all(found):
+            raise KeyError("Pixel ids not found: %s" % str(np.asarray(ids)[~found]))
+        return index
+
+    def __getitem__(self, ids):
+        return self.xyz[self.index(ids)]
+
+    def contains(self, ids):
+        """Boolean array that is True for the ids that are present"""
+        return self.__search(ids)[1]
+
+    def update(self, other):
+        """Replace positions with the ones from other, adding ids that are not present"""
+        index, found = self.__search(other.ids)
+        self.xyz[index[found]] = other.xyz[found]
+        if not np.all(found):
+            self.__init__(np.concatenate((self.ids, other.ids[~found])),
+                          np.concatenate((self.xyz, other.xyz[~found])))
 
-    tube = np.fromiter(map(int, positions[0]), dtype=int)
-    pixel = np.fromiter(map(int, positions[1]), dtype=int)
-    id = tube*128+pixel
+def readEngineeringPositions(filename):
+    positions = readColumns(filename, hasLabels=False,
+                            dtypes={0: int, 1: int, 5: float, 6: float, 7: float})
 
-    x = -1. * np.fromiter(map(float, positions[6]), dtype=float)
-    x[x == -0.] = 0.
-    y = np.fromiter(map(float, positions[5]), dtype=float)
-    z = np.fromiter(map(float, positions[7]), dtype=float)
+    id = positions[0]*128+positions[1]
 
-    positions = {}
-    for i, x_i,y_i,z_i in zip(id, x,y,z):
-        positions[i] = Vector(x_i, y_i, z_i)
+    xyz = np.empty((id.size, 3), dtype=float)
+    xyz[:, 0] = -1. * positions[6]
+    xyz[:, 1] = positions[5]
+    xyz[:, 2] = positions[7]
+    xyz[xyz[:, 0] == -0., 0] = 0.
 
-    return positions
+    return PixelPositions(id, xyz)
 
 def readSurveyPositions(filename):
     # label1, label2, z, x, y
-    positions = readFile(filename, hasLabels=False, headerLines=1)
+    positions = readColumns(filename, hasLabels=False, headerLines=1,
+                            dtypes={0: str, 1: float, 2: float, 3: float})
 
     labels = positions[0]
     # NOTE: label2 column is empty on latest survey, so these indices are shifted back one
-    x = np.fromiter(map(float, positions[2]), dtype=float)
-    y = np.fromiter(map(float, positions[3]), dtype=float)
-    z = np.fromiter(map(float, positions[1]), dtype=float)
+    x = positions[2]
+    y = positions[3]
+    z = positions[1]
 
     ids = []
 
@@ -118,13 +199,10 @@ def readSurveyPositions(filename):
             assert (b == bank)
             ids.append(corners[mapping[pos]])
 
-    positions = {}
-    for i, x_i, y_i, z_i in zip(ids, x, y, z):
-        if x_i == 0. and y_i == 0. and z_i == 0:
-            continue
-        # subtract off distance to source from z values
-        positions[i] = Vector(x_i, y_i, z_i - 19.5)
-    return positions
+    # subtract off distance to source from z values
+    xyz = np.column_stack((x, y, z - 19.5))
+    measured = (x != 0.) | (y != 0.) | (z != 0.)
+    return PixelPositions(np.array(ids)[measured], xyz[measured])
 
 if __name__ == "__main__":
     inst_name = "NOMAD"
@@ -159,10 +237,12 @@ if __name__ == "__main__":
 
     # update engineering postions with values from survey - survey values are worse
     positionsSurvey = readSurveyPositions('SNS/NOMAD/NOMAD_survey_20210121.csv')
-    for i, key in enumerate(positionsSurvey.keys()):
-        positions[key] = positionsSurvey[key]
+    positions.update(positionsSurvey)
 
-    num_banks = [14, 23, 14, 12, 18, 18]
+    num_banks = NUM_BANKS
+
+    # corner positions of every bank in one lookup - (banks, 4, 3)
+    corner_positions = positions[getBankCorners(num_banks)]
 
     ####################
     # add the id lists for groups - [start, stop, step]
@@ -179,110 +259,27 @@ if __name__ == "__main__":
 
     ####################
     # group 1 is banks 1-14 (inclusive)
-    bank_offset = 0
-    group = instr.makeTypeElement('Group1')
-    for i in range(num_banks[0]):
-        bank_num = bank_offset + i + 1
-        bank = "bank%d" % bank_num
-        corners = getCorners(bank_num)
-        rect = getRectangle(bank_num, positions, corners)
-       	det = instr.makeDetectorElement('pack', root=group)
-       	rect.makeLocation(instr, det, bank)
-
     # group 2 is banks 15-37 (inclusive)
-    bank_offset += num_banks[0]
-    group = instr.makeTypeElement('Group2')
-    for i in range(num_banks[1]):
-        bank_num = bank_offset+i+1
-        bank = "bank%d" % bank_num
-        corners = getCorners(bank_num)
-        # appears to be backwards!!!!!!!!!!!!!!!!
-        corners = [corners[1], corners[0], corners[3], corners[2]]
-        rect = getRectangle(bank_num, positions, corners)
-       	det = instr.makeDetectorElement('pack', root=group)
-       	rect.makeLocation(instr, det, bank)
-
     # group 3 is banks 38-51 (inclusive)
-    bank_offset += num_banks[1]
-    group = instr.makeTypeElement('Group3')
-    for i in range(num_banks[2]):
-        bank_num = bank_offset+i+1
-        bank = "bank%d" % bank_num
-        corners = getCorners(bank_num)
-        rect = getRectangle(bank_num, positions, corners)
-       	det = instr.makeDetectorElement('pack', root=group)
-       	rect.makeLocation(instr, det, bank)
-
     # group 4 is banks 52-63 (inclusive)
-    bank_offset += num_banks[2]
-    group = instr.makeTypeElement('Group4')
-    for i in range(num_banks[3]):
-        bank_num = bank_offset+i+1
-        bank = "bank%d" % bank_num
-        corners = getCorners(bank_num)
-
-        rect = getRectangle(bank_num, positions, corners)
-
-       	det = instr.makeDetectorElement('pack', root=group)
-       	rect.makeLocation(instr, det, bank)
-
     # group 5 is banks 64-81 (inclusive) - 72 and 73 are special
-    bank_offset += num_banks[3]
-    group = instr.makeTypeElement('Group5')
-    special = [72, 73]
-    for i in range(num_banks[4]):
-        bank_num = bank_offset+i+1
-        bank = "bank%d" % bank_num
-        if bank_num in special:
-            corners = getCornersSpecial(bank_num)
-        else:
-            corners = getCorners(bank_num)
-
-        # flipy
-        corners = [corners[2], corners[3], corners[0], corners[1]]
-        rect = getRectangle(bank_num, positions, corners)
-
-        if bank_num in special:
-       	    det = instr.makeDetectorElement('packhalfshort', root=group)
-        else:
-       	    det = instr.makeDetectorElement('packhalf', root=group)
-       	rect.makeLocation(instr, det, bank)
-
-
     # group 6 is banks 81-99 (inclusive) - 90 and 91 are special
-    bank_offset += num_banks[4]
-    group = instr.makeTypeElement('Group6')
-    special = [90,91]
-    # Panels 92,93 were moved into backscattering (pixel numbers reassigned),
-    # then 94,95,96 were slid over without reassigning pixles. This dictionary
-    # handles shuffling those around and should be removed for the next run
-    # cycle
-    shuffled = {94:92, 95:93, 96:94, 92:95, 93:96}
-    for i in range(num_banks[5]):
-        bank_num = bank_offset+i+1
-        bank = "bank%d" % bank_num
-        if bank_num in special:
-            corners = getCornersSpecial(bank_num)
-        else:
-            corners = getCorners(shuffled.get(bank_num, bank_num))
-
-        # corners are mixed up
-        if bank_num == 91:
-            # flipx
-            corners = [corners[3], corners[2], corners[1], corners[0]]
-        elif bank_num == 90:
-            # flipy
-            corners = [corners[2], corners[3], corners[0], corners[1]]
-        else:
-            corners = [corners[2], corners[3], corners[0], corners[1]]
-
-        rect = getRectangle(bank_num, positions, corners)
-
-        if bank_num in special:
-       	    det = instr.makeDetectorElement('packhalfshort', root=group)
-        else:
-       	    det = instr.makeDetectorElement('packhalf', root=group)
-       	rect.makeLocation(instr, det, bank)
+    bank_offset = 0
+    for group_num, num_banks_in_pack in enumerate(num_banks):
+        group = instr.makeTypeElement('Group%d' % (group_num+1))
+        for i in range(num_banks_in_pack):
+            bank_num = bank_offset + i + 1
+            bank = "bank%d" % bank_num
+            rect = getRectangle(bank_num, corner_positions[bank_num-1])
+
+            if group_num < 4:
+                det = instr.makeDetectorElement('pack', root=group)
+            elif bank_num in SPECIAL:
+                det = instr.makeDetectorElement('packhalfshort', root=group)
+            else:
+                det = instr.makeDetectorElement('packhalf', root=group)
+            rect.makeLocation(instr, det, bank)
+        bank_offset += num_banks_in_pack
 
     ####################
     # define various "packs" of detectors
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Compare a NOMAD survey with the engineering pixel positions bank by bank.
+For every bank with all four corners in the survey this reports the shift of
+the center and the angle of the rotation between the two orientations, and
+flags the banks that moved more than the thresholds. All banks are solved at
+once so a new survey can be vetted without building and loading an IDF. The
+exit status is 1 if any bank was flagged.
+"""
+from __future__ import print_function
+
+import argparse
+import sys
+import numpy as np
+from nomad_geometry import NUM_BANKS, getBankCorners, readEngineeringPositions, readSurveyPositions
+from rectangle import calcRectangles, rotationAngles
+
+ENGINEERING_FILE = 'SNS/NOMAD/NOM_detpos.txt'
+SURVEY_FILE = 'SNS/NOMAD/NOMAD_survey_20210121.csv'
+HEADER = "%4s %5s %9s %9s %9s %9s %10s %4s" % ("bank", "group", "dx(mm)", "dy(mm)", "dz(mm)",
+                                               "shift(mm)", "angle(deg)", "flag")
+ROWFMT = "%4d %5d %9.3f %9.3f %9.3f %9.3f %10.4f %4s"
+
+
+def calcDrift(engineering, survey, num_banks=NUM_BANKS):
+    """
+    Per-bank differences between the survey and engineering positions.
+    @return dict of arrays with the bank and group numbers, the center
+    shift (survey - engineering) in metres and the rotation angle in degrees
+    """
+    corners = getBankCorners(num_banks)
+    banks = np.arange(1, corners.shape[0] + 1)
+    groups = np.repeat(np.arange(1, len(num_banks) + 1), num_banks)
+
+    # only banks that were completely surveyed can be compared
+    surveyed = np.all(survey.contains(corners), axis=1)
+    corners = corners[surveyed]
+
+    # the survey is what is being vetted, so do not insist on perfect rectangles
+    eng_centers, eng_orient = calcRectangles(engineering[corners], validate=False)
+    survey_centers, survey_orient = calcRectangles(survey[corners], validate=False)
+
+    shift = survey_centers - eng_centers
+    return {"bank": banks[surveyed],
+            "group": groups[surveyed],
+            "shift": shift,
+            "distance": np.sqrt(np.einsum('ij,ij->i', shift, shift)),
+            "angle": np.degrees(rotationAngles(survey_orient, eng_orient))}
+
+
+def writeReport(drift, max_shift, max_angle, handle):
+    """
+    Write one line per bank, flagging the banks beyond either threshold
+    (metres and degrees). Returns the flagged bank numbers.
+    """
+    flagged = (drift["distance"] > max_shift) | (drift["angle"] > max_angle)
+    print(HEADER, file=handle)
+    for i in range(drift["bank"].size):
+        dx, dy, dz = 1000. * drift["shift"][i]
+        print(ROWFMT % (drift["bank"][i], drift["group"][i], dx, dy, dz,
+                        1000. * drift["distance"][i], drift["angle"][i],
+                        "*" if flagged[i] else ""), file=handle)
+    print("# %d of %d banks beyond %.1fmm or %.2fdeg" % (np.count_nonzero(flagged), flagged.size,
+                                                         1000. * max_shift, max_angle), file=handle)
+    return drift["bank"][flagged]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a NOMAD survey with the engineering positions")
+    parser.add_argument('--engineering', default=ENGINEERING_FILE, help='pixel positions file')
+    parser.add_argument('--survey', default=SURVEY_FILE, help='survey csv file')
+    parser.add_argument('--max-shift', type=float, default=0.005,
+                        help='flag banks whose center moved more than this (metres)')
+    parser.add_argument('--max-angle', type=float, default=0.5,
+                        help='flag banks that rotated more than this (degrees)')
+    parser.add_argument('--output', help='write the table here instead of stdout')
+    options = parser.parse_args()
+
+    drift = calcDrift(readEngineeringPositions(options.engineering),
+                      readSurveyPositions(options.survey))
+    if options.output:
+        with open(options.output, 'w') as handle:
+            flagged = writeReport(drift, options.max_shift, options.max_angle, handle)
+        print('wrote', options.output)
+    else:
+        flagged = writeReport(drift, options.max_shift, options.max_angle, sys.stdout)
+    # a survey with banks beyond the thresholds fails in batch use
+    sys.exit(1 if len(flagged) > 0 else 0)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""Cache for parsed generator inputs.
+
+Parsers that turn an input file into a dictionary of numpy arrays can be
+wrapped with the "cached" decorator. The arrays are stored as .npy files
+under a directory keyed on the content hash of the input file, the name and
+version of the parser and the arguments it was called with. A later call
+with the same input memory-maps the stored arrays instead of parsing.
+
+Caching is turned on by pointing the MANTIDGEOMETRY_CACHE environment
+variable at a directory. Without it the parsers are called directly.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+CACHE_ENV = "MANTIDGEOMETRY_CACHE"
+INDEX = "index.json"
+
+
+def getCacheDir():
+    """Return the cache directory, or None if caching is turned off."""
+    direc = os.environ.get(CACHE_ENV, "")
+    if len(direc) <= 0:
+        return None
+    return os.path.expanduser(direc)
+
+
+def hashFile(filename, blocksize=1 << 20):
+    """Return the sha1 hex digest of the contents of a file."""
+    digest = hashlib.sha1()
+    with open(filename, "rb") as handle:
+        for block in iter(lambda: handle.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def makeKey(filename, parser, version, args, kwargs):
+    """Key for a parsed file. Any change in content, parser or arguments
+    gives a different key."""
+    digest = hashlib.sha1()
+    digest.update(hashFile(filename).encode())
+    digest.update(("%s.%s" % (parser.__module__, parser.__name__)).encode())
+    digest.update(str(version).encode())
+    digest.update(repr(args).encode())
+    digest.update(repr(sorted(kwargs.items())).encode())
+    return digest.hexdigest()
+
+
+def __load(direc):
+    with open(os.path.join(direc, INDEX), "r") as handle:
+        labels = json.load(handle)
+    # copy-on-write so callers can modify the arrays without touching the cache
+    return dict((label, np.load(os.path.join(direc, "%d.npy" % i), mmap_mode="c"))
+                for i, label in enumerate(labels))
+
+
+def __save(direc, result):
+    """Write the arrays to a temporary directory and move it into place so
+    that readers never see a partial entry. Returns False if the result
+    cannot be stored without pickling."""
+    labels = list(result.keys())
+    arrays = [np.asarray(result[label]) for label in labels]
+    if any(array.dtype.hasobject for array in arrays):
+        return False
+    for label in labels:
+        if not isinstance(label, (int, str)):
+            return False
+
+    parent = os.path.dirname(direc)
+    if not os.path.exists(parent):
+        os.makedirs(parent)
+    tempdir = tempfile.mkdtemp(dir=parent)
+    try:
+        for i, array in enumerate(arrays):
+            np.save(os.path.join(tempdir, "%d.npy" % i), array, allow_pickle=False)
+        with open(os.path.join(tempdir, INDEX), "w") as handle:
+            json.dump(labels, handle)
+        os.rename(tempdir, direc)
+    except OSError:
+        # another process got there first
+        shutil.rmtree(tempdir, ignore_errors=True)
+    return True
+
+
+def cached(version):
+    """Decorator for a parser whose first argument is the name of the input
+    file and that returns a dictionary of numpy arrays keyed by int or str.
+    Bump "version" whenever the output of the parser changes."""
+    def decorator(parser):
+        @functools.wraps(parser)
+        def wrapper(filename, *args, **kwargs):
+            cachedir = getCacheDir()
+            if cachedir is None or not os.path.isfile(filename):
+                return parser(filename, *args, **kwargs)
+
+            key = makeKey(filename, parser, version, args, kwargs)
+            direc = os.path.join(cachedir, key)
+            if os.path.exists(os.path.join(direc, INDEX)):
+                return __load(direc)
+
+            result = parser(filename, *args, **kwargs)
+            if __save(direc, result):
+                return __load(direc)
+            return result
+        return wrapper
+    return decorator
+
+
+def clearCache():
+    """Remove every entry from the cache directory."""
+    cachedir = getCacheDir()
+    if cachedir is not None and os.path.exists(cachedir):
+        shutil.rmtree(cachedir)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--clear":
+        clearCache()
+    else:
+        print("%s=%s" % (CACHE_ENV, getCacheDir()))
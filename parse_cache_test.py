@@ -0,0 +1,64 @@
+#!/bin/env python
+import parse_cache
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+CALLS = []
+
+
+@parse_cache.cached(version=1)
+def parse(filename, scale=1.):
+    CALLS.append(filename)
+    values = np.loadtxt(filename, ndmin=1) * scale
+    return {"values": values, 0: np.array(["a", "b"])}
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        handle, self.filename = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w") as datafile:
+            datafile.write("1.\n2.\n")
+        os.environ[parse_cache.CACHE_ENV] = self.cachedir
+        del CALLS[:]
+
+    def tearDown(self):
+        del os.environ[parse_cache.CACHE_ENV]
+        shutil.rmtree(self.cachedir)
+        os.remove(self.filename)
+
+    def testHit(self):
+        first = parse(self.filename)
+        second = parse(self.filename)
+        self.assertEqual(len(CALLS), 1)
+        self.assertTrue(isinstance(second["values"], np.memmap))
+        self.assertEqual(second["values"].tolist(), first["values"].tolist())
+        self.assertEqual(second[0].tolist(), ["a", "b"])
+
+        # modifying the result must not change the cache
+        second["values"][0] = 10.
+        self.assertEqual(parse(self.filename)["values"][0], 1.)
+
+    def testMiss(self):
+        parse(self.filename)
+        parse(self.filename, scale=2.)
+        self.assertEqual(len(CALLS), 2)
+
+        with open(self.filename, "a") as datafile:
+            datafile.write("3.\n")
+        self.assertEqual(parse(self.filename)["values"].tolist(), [1., 2., 3.])
+        self.assertEqual(len(CALLS), 3)
+
+    def testDisabled(self):
+        del os.environ[parse_cache.CACHE_ENV]
+        parse(self.filename)
+        parse(self.filename)
+        self.assertEqual(len(CALLS), 2)
+        os.environ[parse_cache.CACHE_ENV] = self.cachedir
+
+
+if __name__ == "__main__":
+    unittest.main(module="parse_cache_test", verbosity=2)
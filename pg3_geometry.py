@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 
 from helper import INCH_TO_METRE, DEG_TO_RAD, MantidGeom
-from rectangle import Rectangle, Vector, getEuler, makeLocation
+from rectangle import Rectangle, calcRectangles, getEuler, getRotationsYZY, makeLocation
 from lxml import etree as le # python-lxml on rpm based systems
 from math import cos, sin, radians, pi
 import numpy as np
-from sns_ncolumn import readFile
+from sns_ncolumn import readColumns
 
 # size of the panels from original pixel sizes
 x_extent = 154*.005
@@ -18,93 +18,54 @@ y_num2 = 7
 # primary flight path - negative b/c it is upstream
 L1 = -60.0
 
-def readPositionsRight(filename):
-    positions = readFile(filename)
-    del positions['Position']
-    del positions['DetectorNum']
-
-    x = np.array(map(float, positions['X']))
-    y = np.array(map(float, positions['Elevation']))
-    z = np.array(map(float, positions['Z'])) - 60.
-    positions['bank'] = np.array(map(int, positions['bank']))
-
-    positions['position'] = []
-    for x_i,y_i,z_i in zip(x,y,z):
-        positions['position'].append(Vector(x_i, y_i, z_i))
-
-    del positions['X']
-    del positions['Elevation']
-    del positions['Z']
-
-    columnnames = {'SA':1, 'SB':2, 'SC':3, 'SD':4, 'SE':5, 'SF':6,
-                   'SG':7, 'SH':8, 'SI':9, 'SJ':10, 'SK':11, 'SL':12}
-
-    banks = {}
-    for i, (column, row, bank, position) in enumerate(zip(positions['column'], positions['row'], positions['bank'], positions['position'])):
-        i = i%4
-        if i == 0:
-            one = position
-        elif i == 1:
-            two = position
-        elif i == 2:
-            three = position
-        elif i == 3:
-            four = position
-        else:
-            raise ValueError("Inconceivable! i = %d" % i)
-
-        if i == 3:
-            column = 'Column%d' % columnnames[column]
-            banks[int(bank)] = (column, Rectangle(four, one, two, three, tolerance_len=0.006))
-
-    return banks
-
-def readPositionsLeft(filename):
-    positions = readFile(filename)
-    x = np.array(map(float, positions['X']))
-    y = np.array(map(float, positions['Elevation']))
-    z = np.array(map(float, positions['Z']))
-    positions['position'] = []
-    for x_i,y_i,z_i in zip(x,y,z):
-        positions['position'].append(Vector(x_i, y_i, z_i))
-
-    del positions['X']
-    del positions['Elevation']
-    del positions['Z']
-
-    names = {'D596':79,
-             'D579':76,
-             'D261':73,
-             'D585':70,
-             'D586':67,
-             'D573':64,
-             'D571':61,
-             'D574':58,
-             'D225':55,
-             'D565':52,
-             'D551':48,
-             'D594':43}
-    columnnames = {43:13, 48:14, 52:15, 55:16, 58:17, 61:18, 64:19, 67:20, 70:21, 73:22, 76:23, 79:24}
-    banks = {}
-    for i, (det, position) in enumerate(zip(positions['Detector'], positions['position'])):
-        bank = names[det[:4]]
-        i = i%4
-        if i == 0:
-            three = position
-        elif i == 1:
-            four = position
-        elif i == 2:
-            one = position
-        elif i == 3:
-            two = position
-        else:
-            raise ValueError("Inconceivable! i = %d" % i)
-
-        if i == 3:
-            column = 'Column%d' % columnnames[bank]
-            banks[bank] = (column, Rectangle(four, one, two, three, tolerance_len=0.006))
-
-    return banks
+# bank number of each detector in the left (north) side survey
+LEFT_DETECTORS = {'D596':79,
+                  'D579':76,
+                  'D261':73,
+                  'D585':70,
+                  'D586':67,
+                  'D573':64,
+                  'D571':61,
+                  'D574':58,
+                  'D225':55,
+                  'D565':52,
+                  'D551':48,
+                  'D594':43}
+
+# column number of each right (south) side survey column
+RIGHT_COLUMNS = {'SA':1, 'SB':2, 'SC':3, 'SD':4, 'SE':5, 'SF':6,
+                 'SG':7, 'SH':8, 'SI':9, 'SJ':10, 'SK':11, 'SL':12}
+# column number of each left (north) side bank
+LEFT_COLUMNS = {43:13, 48:14, 52:15, 55:16, 58:17, 61:18, 64:19, 67:20, 70:21, 73:22, 76:23, 79:24}
+
+# order of the four surveyed points of a bank as they are handed to the
+# rectangle solve, starting from the lower left corner
+RIGHT_ORDER = [3, 0, 1, 2]
+LEFT_ORDER = [1, 2, 3, 0]
+
+def readPositions(filename, left=False):
+    """
+    Read a survey of one side of the instrument. Each bank is four
+    consecutive rows and all of the banks are solved at once.
+    @return (banks, columns, centers, orientations) with the bank numbers,
+    the names of their columns, and (N, 3) and (N, 3, 3) arrays
+    """
+    positions = readColumns(filename)
+    z = positions['Z']
+    if left:
+        banks = np.array([LEFT_DETECTORS[det[:4]] for det in positions['Detector'][::4]])
+        columns = [LEFT_COLUMNS[bank] for bank in banks]
+        order = LEFT_ORDER
+    else:
+        z = z + L1
+        banks = positions['bank'][::4]
+        columns = [RIGHT_COLUMNS[column] for column in positions['column'][::4]]
+        order = RIGHT_ORDER
+    points = np.stack((positions['X'], positions['Elevation'], z), axis=1)
+    points = points.reshape(-1, Rectangle.NPOINTS, 3)[:, order]
+
+    centers, orientations = calcRectangles(points, tolerance_len=0.006)
+    return banks, ['Column%d' % column for column in columns], centers, orientations
 
 if __name__ == "__main__":
     inst_name = "PG3"
@@ -161,15 +122,12 @@ if __name__ == "__main__":
     # guides - not even copying the text
 
     # read in detectors
-    banks = readPositionsRight("SNS/POWGEN/PG3_geom_2017.csv")
-    banksL = readPositionsLeft("SNS/POWGEN/PG3_geom_left_2018.csv")
-    for bank in banksL.keys():
-        banks[bank] = banksL[bank]
-    del banksL
+    right = readPositions("SNS/POWGEN/PG3_geom_2017.csv")
+    left = readPositions("SNS/POWGEN/PG3_geom_left_2018.csv", left=True)
+    banks, columns, centers, orientations = [np.concatenate(both) for both in zip(right, left)]
 
-    # delete the banks that are no longer installed
-    for bank in [1,5,6,10,32,35,38,28,31,34,37,40]:
-        del banks[bank]
+    # skip the banks that are no longer installed
+    installed = np.flatnonzero(~np.isin(banks, [1,5,6,10,32,35,38,28,31,34,37,40]))
 
     # create north and south sides
     sides = {'North':['Column%d' % i for i in range(13,25)],
@@ -184,19 +142,11 @@ if __name__ == "__main__":
         for column in sides[side]:
             instr.addComponent(column, root=group)
 
-    # create an ordered list of all columns
-    columns = set()
-    for name in banks.keys():
-        column, _ =  banks[name]
-        columns.add(column)
-    columns = list(columns)
-    columns.sort()
-
     createdcolumns = dict()
-    for name in banks.keys():
-        offset = (int(name)-1) * 15000
-        column, rect =  banks[name]
-        name = 'bank'+str(name)
+    for i in installed:
+        offset = (int(banks[i])-1) * 15000
+        column = columns[i]
+        name = 'bank'+str(banks[i])
 
         # create the column if it doesn't already exist
         if column in createdcolumns:
@@ -207,7 +157,9 @@ if __name__ == "__main__":
 
         extra_attrs={"idstart":offset, 'idfillbyfirst':'y', 'idstepbyrow':y_num2}
         det = instr.makeDetectorElement('panel_v2', root=col, extra_attrs=extra_attrs)
-        rect.makeLocation(instr, det, name)
+        rotations = list(getRotationsYZY(orientations[i]))
+        rotations.reverse()
+        makeLocation(instr, det, name, centers[i], rotations)
 
     # add the panel shape
     instr.addComment(" Version 2 Detector Panel (7x154)")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Compare every POWGEN survey epoch with every other one. The corners of all
+epochs are gathered into one (epochs, banks, 4, 3) array, with NaN for banks
+that an epoch did not survey, all of the rectangles are solved in one batch
+and the result is an epoch x epoch x bank matrix of center shifts and
+rotation angles.
+"""
+from __future__ import print_function
+
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+from pg3_geometry import L1, LEFT_DETECTORS, LEFT_ORDER, RIGHT_ORDER
+from rectangle import calcRectangles, pairwiseDrift, writeDriftSummary
+from sns_ncolumn import readColumns
+
+SURVEY_FILES = 'SNS/POWGEN/PG3_geom_*.csv'
+
+# order of the surveyed points 1-4 handed to the rectangle solve
+POINT_ID_ORDER = [1, 0, 3, 2]
+
+
+def readEpoch(filename):
+    """
+    Read one survey. The three layouts in SNS/POWGEN are recognised by their
+    columns: "Point_ID" labels like B2_1, the numbered right side banks of
+    2017 and the left side detectors of 2018.
+    @return (labels, corners) where corners is a (banks, 4, 3) array in the
+    sample frame
+    """
+    columns = readColumns(filename)
+    if 'Point_ID' in columns:
+        parts = np.char.partition(columns['Point_ID'], '_')
+        banks, points = parts[:, 0], parts[:, 2].astype(int)
+        y = columns['Y']
+        z = columns['Z'] + L1
+        order = POINT_ID_ORDER
+    elif 'bank' in columns:
+        banks = np.char.mod('bank%d', columns['bank'])
+        points = np.char.rpartition(columns['Position'], '_')[:, 2].astype(int)
+        y = columns['Elevation']
+        z = columns['Z'] + L1
+        order = RIGHT_ORDER
+    elif 'Detector' in columns:
+        parts = np.char.partition(columns['Detector'], 'M')
+        banks = np.array(['bank%d' % LEFT_DETECTORS[name] for name in parts[:, 0]])
+        points = parts[:, 2].astype(int)
+        y = columns['Elevation']
+        z = columns['Z']
+        order = LEFT_ORDER
+    else:
+        raise RuntimeError("Do not know how to read the survey in '%s'" % filename)
+    xyz = np.stack((columns['X'], y, z), axis=1)
+
+    # group the points by bank, in the order they are numbered
+    rows = np.lexsort((points, banks))
+    labels, counts = np.unique(banks, return_counts=True)
+    if np.any(counts != 4) or np.any(points[rows].reshape(-1, 4) != np.arange(1, 5)):
+        raise RuntimeError("Every bank in '%s' needs points 1 to 4" % filename)
+    return labels, xyz[rows].reshape(-1, 4, 3)[:, order]
+
+
+def stackEpochs(epochs):
+    """
+    Put the (labels, corners) of several surveys into one array.
+    @return (labels, corners) with the sorted union of the labels and an
+    (epochs, banks, 4, 3) array that is NaN where a bank was not surveyed
+    """
+    labels = np.unique(np.concatenate([epoch[0] for epoch in epochs]))
+    corners = np.full((len(epochs), labels.size, 4, 3), np.nan)
+    for i, (epoch_labels, epoch_corners) in enumerate(epochs):
+        corners[i, np.searchsorted(labels, epoch_labels)] = epoch_corners
+    return labels, corners
+
+
+def calcDriftMatrix(corners):
+    """
+    Shift and rotation of every bank between every pair of epochs.
+    @param corners (epochs, banks, 4, 3) array, NaN for missing banks
+    @return dict of "shift" (epochs, epochs, banks, 3) in metres, "distance"
+    and "angle" (epochs, epochs, banks) in metres and degrees. Element
+    [i, j] is how far epoch j moved from epoch i, NaN where either is missing.
+    """
+    num_epochs, num_banks = corners.shape[:2]
+    present = ~np.any(np.isnan(corners), axis=(2, 3))
+
+    # the surveys are what is being compared, so do not insist on perfect rectangles
+    centers = np.full((num_epochs, num_banks, 3), np.nan)
+    orientations = np.full((num_epochs, num_banks, 3, 3), np.nan)
+    centers[present], orientations[present] = calcRectangles(corners[present], validate=False)
+
+    return pairwiseDrift(centers, orientations)
+
+
+def writeSummary(names, labels, drift, handle):
+    """Write the largest shift and rotation between each pair of epochs"""
+    writeDriftSummary(names, labels, drift, handle)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare all of the POWGEN survey epochs")
+    parser.add_argument('surveys', nargs='*', help='survey files, oldest first (default %s)'
+                        % SURVEY_FILES)
+    parser.add_argument('--output', help='save the full matrix to this .npz file')
+    options = parser.parse_args()
+
+    filenames = options.surveys if options.surveys else sorted(glob.glob(SURVEY_FILES))
+    names = [os.path.splitext(os.path.basename(filename))[0] for filename in filenames]
+    labels, corners = stackEpochs([readEpoch(filename) for filename in filenames])
+    drift = calcDriftMatrix(corners)
+
+    writeSummary(names, labels, drift, sys.stdout)
+    if options.output:
+        np.savez(options.output, epochs=np.array(names), banks=labels, **drift)
+        print('wrote', options.output)
@@ -205,6 +205,42 @@ def getEuler(uVec, vVec, **kwargs):
             result[i] = 0.
     return tuple(result)
 
+
+def getEulers(uVecs, vVecs, degrees=False):
+    """
+    Vectorized version of getEuler for (N, 3) arrays of u and v vectors.
+    @return (N, 3) array of phi, chi, omega
+    """
+    uVecs = normalizeRows(uVecs)
+    nVecs = normalizeRows(np.cross(uVecs, np.asarray(vVecs, dtype=float)))
+    vVecs = normalizeRows(np.cross(nVecs, uVecs))
+
+    # make sure the new unit vectors are orthogonal
+    for label, first, second in (('u dot v', uVecs, vVecs), ('u dot n', uVecs, nVecs),
+                                 ('v dot n', vVecs, nVecs)):
+        dots = np.abs(np.einsum('ij,ij->i', first, second))
+        if np.any(dots > TOLERANCE):
+            raise RuntimeError('{} is too large: {} > {}'.format(label, dots.max(), TOLERANCE))
+
+    angles = np.zeros(uVecs.shape, dtype=float)
+    up = vVecs[:, 1] == 1.  # chi rotation is 0, just rotate about z-axis
+    angles[up, 0] = np.arctan2(nVecs[up, 0], nVecs[up, 2])
+    down = vVecs[:, 1] == -1.  # chi rotation is 180 degrees
+    phi = -1. * np.arctan2(nVecs[down, 0], nVecs[down, 2])
+    phi[phi == -1. * math.pi] = math.pi
+    angles[down, 0] = phi
+    angles[down, 1] = math.pi
+    generic = ~(up | down)
+    angles[generic, 0] = np.arctan2(nVecs[generic, 1], uVecs[generic, 1])
+    # math.acos rather than np.arccos, whose SIMD version can differ from getEuler in the last bit
+    angles[generic, 1] = np.vectorize(math.acos, otypes=[float])(vVecs[generic, 1])
+    angles[generic, 2] = np.arctan2(vVecs[generic, 2], -1. * vVecs[generic, 0])
+
+    if degrees:
+        angles = np.degrees(angles)
+    angles[np.abs(angles) == 0.] = 0.
+    return angles
+
 def __genRotationDict(rotation):
     """
     Generate the dict used for creating attributes.
@@ -316,6 +352,20 @@ def getZYZ(rotation):
 
     return angles
 
+
+def getRotationsYZY(orientation):
+    """
+    The YZY euler rotations of an orientation matrix as (angle in degrees,
+    axis of rotation) pairs.
+    """
+    angles = np.degrees(getYZY(orientation))
+
+    alpha_rot = [-1.*angles[0], (0., 1., 0.)]
+    beta_rot = [-1.*angles[1], (0., 0., 1.)]
+    gamma_rot = [-1.*angles[2], (0., 1., 0.)]
+
+    return (alpha_rot, beta_rot, gamma_rot)
+
 def makeLocation(instr, det, name, center, rotations, tol_ang=TOLERANCE):
     """
     Make a location appropriate for an instrument component.
@@ -449,13 +499,7 @@ class Rectangle:
         return (alpha_rot, beta_rot, gamma_rot)
 
     def __euler_rotations_yzy(self):
-        angles = np.degrees(getYZY(self.__orient))
-
-        alpha_rot = [-1.*angles[0], (0., 1., 0.)]
-        beta_rot  = [-1.*angles[1], (0., 0., 1.)]
-        gamma_rot = [-1.*angles[2], (0., 1., 0.)]
-
-        return (alpha_rot, beta_rot, gamma_rot)
+        return getRotationsYZY(self.__orient)
 
     def __width(self):
         width = self.__points[3] - self.__points[0]
@@ -503,3 +547,130 @@ class Rectangle:
         rotations.reverse() # may need this
 
         makeLocation(instr, det, name, self.__center, rotations, self._tol_ang)
+
+
+def normalizeRows(vectors):
+    """
+    Normalize each row of an (N, 3) array the same way Vector.normalize does:
+    rows that are already a positive unit axis are set to it exactly,
+    everything else is divided by its length and near zeros are set to zero.
+    """
+    vectors = np.array(vectors, dtype=float).reshape(-1, 3)
+    # matmul sums in the same order as np.dot so results match Vector exactly
+    lengths = np.sqrt(np.matmul(vectors[:, np.newaxis, :], vectors[:, :, np.newaxis])[:, 0, 0])
+    if np.any(np.abs(lengths) < TOLERANCE):
+        raise RuntimeError("Zero vector of zero length")
+
+    cardinal = np.zeros(vectors.shape[0], dtype=bool)
+    for unit_vec in (UNIT_X, UNIT_Y, UNIT_Z):
+        match = (np.abs(lengths - 1.) <= TOLERANCE) \
+            & np.all(np.isclose(vectors, unit_vec.data, atol=TOLERANCE), axis=1) & ~cardinal
+        vectors[match] = unit_vec.data
+        cardinal |= match
+
+    vectors[~cardinal] /= lengths[~cardinal, np.newaxis]
+    generic = vectors[~cardinal]
+    generic[np.abs(generic) < TOLERANCE] = 0.
+    vectors[~cardinal] = generic
+    return vectors
+
+
+def calcRectangles(points, tolerance_len=TOLERANCE, validate=True):
+    """
+    Vectorized version of Rectangle for many rectangles at once.
+    @param points (N, 4, 3) array of corners, each set ordered as for Rectangle
+    @param validate Check that the corners form rectangles
+    @return (centers, orientations) with shapes (N, 3) and (N, 3, 3)
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, Rectangle.NPOINTS, 3)
+    p1, p2, p3, p4 = points[:, 0], points[:, 1], points[:, 2], points[:, 3]
+
+    if validate:
+        def magnitudeSq(vectors):
+            return np.einsum('ij,ij->i', vectors, vectors)
+
+        def lengths(vectors):
+            return np.sqrt(magnitudeSq(vectors))
+        left = p2 - p1
+        right = p4 - p3
+        top = p2 - p3
+        bottom = p4 - p1
+        # points in the incorrect order
+        diagonal = magnitudeSq(p3 - p1)
+        bad = (magnitudeSq(left) > diagonal) | (magnitudeSq(bottom) > diagonal)
+        # opposite sides are not equal and parallel or the corner is not square
+        bad |= np.abs(lengths(left) - lengths(right)) > tolerance_len
+        bad |= np.abs(lengths(top) - lengths(bottom)) > tolerance_len
+        bad |= np.any(np.abs(left + right) > tolerance_len, axis=1)
+        bad |= np.abs(np.einsum('ij,ij->i', left, bottom)) > tolerance_len
+        if np.any(bad):
+            raise RuntimeError("Points are not rectangle corners for indices %s"
+                               % str(np.flatnonzero(bad).tolist()))
+
+    centers = (p1 + p2 + p3 + p4) / float(Rectangle.NPOINTS)
+
+    # same direction vectors as Rectangle.__calcOrientation
+    xvec = .5 * (p4 + p3) - centers
+    yvec = -.5 * (p1 + p4) + centers
+    zvec = np.cross(xvec, yvec)
+    orientations = np.stack((normalizeRows(xvec), normalizeRows(yvec), normalizeRows(zvec)),
+                            axis=1)
+    return centers, orientations
+
+
+def rotationAngles(first, second):
+    """
+    Angle in radians of the rotation between each pair of orientations in
+    two (N, 3, 3) arrays.
+    """
+    relative = np.einsum('nij,nkj->nik', first, second)
+    cosine = .5 * (np.trace(relative, axis1=1, axis2=2) - 1.)
+    return np.arccos(np.clip(cosine, -1., 1.))
+
+
+def pairwiseDrift(centers, orientations):
+    """
+    Shift and rotation of every bank between every pair of sets of banks,
+    for example calibrations or survey epochs.
+    @param centers (sets, banks, 3) array, NaN for missing banks
+    @param orientations (sets, banks, 3, 3) array, NaN for missing banks
+    @return dict of "shift" (sets, sets, banks, 3), "distance" and "angle"
+    (sets, sets, banks) in the units of the centers and degrees. Element
+    [i, j] is how far set j moved from set i, NaN where either is missing.
+    """
+    num_sets, num_banks = centers.shape[:2]
+    shift = centers[np.newaxis, :] - centers[:, np.newaxis]
+    shape = (num_sets, num_sets, num_banks, 3, 3)
+    first = np.broadcast_to(orientations[:, np.newaxis], shape).reshape(-1, 3, 3)
+    second = np.broadcast_to(orientations[np.newaxis, :], shape).reshape(-1, 3, 3)
+    return {"shift": shift,
+            "distance": np.sqrt(np.einsum('...k,...k->...', shift, shift)),
+            "angle": np.degrees(rotationAngles(first, second)).reshape(shape[:3])}
+
+
+def writeDriftSummary(names, banks, drift, handle, columns=()):
+    """
+    Write the largest shift, in mm for centers in metres, and rotation of
+    a bank between each pair of sets compared by pairwiseDrift.
+    @param names name of every set
+    @param banks label of every bank
+    @param columns (title, (sets, sets) array) of more changes to write
+    for each pair before the shift
+    """
+    width = max([len(name) for name in names] + [4])
+    print("%-*s %-*s %5s" % (width, "from", width, "to", "banks")
+          + "".join(" %8s" % title for title, _ in columns)
+          + " %9s %6s %10s %6s" % ("shift(mm)", "bank", "angle(deg)", "bank"), file=handle)
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            distance = drift["distance"][i, j]
+            common = ~np.isnan(distance)
+            line = "%-*s %-*s %5d" % (width, names[i], width, names[j], np.count_nonzero(common))
+            if np.any(common):
+                angle = drift["angle"][i, j]
+                far = np.nanargmax(distance)
+                turned = np.nanargmax(angle)
+                line += "".join(" %8.3f" % values[i, j] for _, values in columns)
+                line += " %9.3f %6s %10.4f %6s" % (1000. * distance[far], banks[far],
+                                                   angle[turned], banks[turned])
+            print(line, file=handle)
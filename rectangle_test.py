@@ -1,10 +1,14 @@
 #!/bin/env python
-from rectangle import Rectangle, calcEuler, checkRotation, generateRotation, \
-    getAngle, getYZY, getZYZ
+from rectangle import Rectangle, calcEuler, calcRectangles, checkRotation, generateRotation, \
+    getAngle, getEuler, getEulers, getYZY, getZYZ, pairwiseDrift, rotationAngles, writeDriftSummary
 from rectangle import Vector, UNIT_X, UNIT_Y, UNIT_Z
 import math
 import numpy as np
 import unittest
+try:
+    from StringIO import StringIO  # python2, takes native str
+except ImportError:
+    from io import StringIO  # python3
 
 def assertAllClose(obs, exp, atol):
     if atol == 0.:
@@ -63,6 +67,59 @@ class TestRectangle(unittest.TestCase):
         #                             (0.0, 0.0, -1.0)))
         #self.checkRotation(rect, 90., 180., 0.)
 
+
+class TestCalcRectangles(unittest.TestCase):
+    CORNERS = [((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)),
+               ((0, 1, 0), (1, 1, 0), (1, 0, 0), (0, 0, 0)),
+               ((1, 1, 0), (0, 1, 0), (0, 0, 0), (1, 0, 0)),
+               ((1, 0, 0), (0, 0, 0), (0, 1, 0), (1, 1, 0)),
+               ((.1, -.2, 2.), (.1, .8, 2.), (.5, .8, 2.3), (.5, -.2, 2.3))]
+
+    def testMatchesRectangle(self):
+        centers, orientations = calcRectangles(self.CORNERS)
+        for i, corners in enumerate(self.CORNERS):
+            rect = Rectangle(*corners)
+            assertAllClose(centers[i], rect.center.data, 0.)
+            assertAllClose(orientations[i], rect.orientation, 0.)
+
+    def testBadCorners(self):
+        corners = np.array(self.CORNERS, dtype=float)
+        corners[1, 2, 0] += .1
+        self.assertRaises(RuntimeError, calcRectangles, corners)
+        calcRectangles(corners, validate=False)
+
+    def testRotationAngles(self):
+        _, orientations = calcRectangles(self.CORNERS[:2])
+        angles = np.degrees(rotationAngles(orientations, orientations[::-1]))
+        assertAllClose(angles, [180., 180.], 1.e-6)
+        assertAllClose(rotationAngles(orientations, orientations), [0., 0.], 1.e-6)
+
+    def testPairwiseDrift(self):
+        # two sets of the same two banks, the second set moved and the first bank missing from a third
+        centers, orientations = calcRectangles(self.CORNERS[:2] + self.CORNERS[1:3])
+        centers = centers.reshape(2, 2, 3) + [[[0., 0., 0.]], [[.003, .004, 0.]]]
+        orientations = orientations.reshape(2, 2, 3, 3)
+        centers = np.concatenate((centers, centers[:1]))
+        orientations = np.concatenate((orientations, orientations[:1]))
+        centers[2, 0] = orientations[2, 0] = np.nan
+        drift = pairwiseDrift(centers, orientations)
+        self.assertEqual(drift["shift"].shape, (3, 3, 2, 3))
+        assertAllClose(drift["distance"][0, 1], [.005, .005], 1.e-12)
+        assertAllClose(drift["distance"][1, 0], [.005, .005], 1.e-12)
+        assertAllClose(drift["angle"][0, 1], [180., 180.], 1.e-6)
+        assertAllClose(drift["angle"][0, 0], [0., 0.], 1.e-6)
+        self.assertTrue(np.isnan(drift["distance"][0, 2, 0]))
+
+        handle = StringIO()
+        writeDriftSummary(['first', 'second', 'third'], ['A', 'B'], drift, handle,
+                          columns=(("dT0(us)", np.full((3, 3), 1.5)),))
+        lines = handle.getvalue().splitlines()
+        self.assertEqual(lines[0].split(), ['from', 'to', 'banks', 'dT0(us)', 'shift(mm)', 'bank',
+                                            'angle(deg)', 'bank'])
+        self.assertEqual(lines[1].split(), ['first', 'second', '2', '1.500', '5.000', 'A', '180.0000', 'A'])
+        self.assertEqual(lines[2].split()[2:], ['1', '1.500', '0.000', 'B', '0.0000', 'B'])
+
+
 class TestGetAngle(unittest.TestCase):
     def check(self, y, x, angle):
         self.assertEqual(math.degrees(getAngle(y,x)), angle)
@@ -73,6 +130,21 @@ class TestGetAngle(unittest.TestCase):
         self.check(0., -1., 180.)
         self.check(-1., 0., 270.)
 
+
+class TestGetEulers(unittest.TestCase):
+    def testMatchesGetEuler(self):
+        base = np.array([[-0.99935, 0.03224, -0.01621], [-0.00749, 0.00076, 0.99997],
+                         [0.66012, 0.51455, 0.54725]])
+        up = np.array([[-0.00157, 0.40955, 0.91228], [0.95277, 0.30362, 0.00690],
+                       [0.21037, 0.57274, -0.79228]])
+        expected = [getEuler(Vector(u), Vector(v), degrees=True) for u, v in zip(base, up)]
+        assertAllClose(getEulers(base, up, degrees=True), expected, 0.)
+
+    def testChiZero(self):
+        angles = getEulers([[0., 0., -1.]], [[0., 1., 0.]], degrees=True)
+        assertAllClose(angles, [[90., 0., 0.]], 0.)
+
+
 IDENTITY = np.array([[1,0,0],[0,1,0],[0,0,1]], dtype=np.float)
 ATOL_ROTATION = 1.e-15
 
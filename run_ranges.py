@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""Index of inputs that are valid for a range of run numbers.
+
+Time-sliced inputs like CNCS_geom_53377-67316.txt carry their range of
+validity in the filename. RunRangeIndex splits the closed ranges into
+disjoint segments that each know which range applies there, so the input
+for a run is found by bisection rather than by expanding every range into
+its run numbers.
+"""
+from __future__ import print_function
+
+import bisect
+import heapq
+import os
+import re
+
+RANGE_PATTERN = re.compile(r'(\d+)-(\d*)$')
+
+
+def parseRunRange(name):
+    """Return the (start, stop) runs encoded at the end of a name like
+    'CNCS_geom_53377-67316.txt'. An open-ended range like '159160-' has
+    stop=None. Returns None if the name does not end in a run range."""
+    name = os.path.splitext(os.path.basename(name))[0]
+    match = RANGE_PATTERN.search(name)
+    if match is None:
+        return None
+    start = int(match.group(1))
+    stop = int(match.group(2)) if len(match.group(2)) > 0 else None
+    if stop is not None and stop < start:
+        raise RuntimeError("Run range in '%s' is backwards" % name)
+    return (start, stop)
+
+
+class RunRangeIndex:
+    """Maps closed ranges of runs to a value, usually a filename. Ranges may
+    overlap, in which case the one starting latest wins.
+
+    find and "in" are O(log n) for n ranges. The first query after adding
+    ranges rebuilds the segments in O(n log n). findAll walks back from the
+    run and is O(n) when an earlier open-ended or long range overlaps many
+    later ones."""
+
+    def __init__(self, ranges=None):
+        # parallel lists sorted by start
+        self.__starts = []
+        self.__stops = []
+        self.__values = []
+        self.__maxStop = []  # running maximum of the stops
+        self.__byValue = {}
+        self.__bounds = None  # first run of every segment, built when needed
+        self.__winners = None  # index of the range that applies in each segment
+        if ranges is not None:
+            for start, stop, value in ranges:
+                self.add(start, stop, value)
+
+    @staticmethod
+    def fromFilenames(filenames):
+        """Build an index from filenames with a run range at the end of the
+        name. Files without a run range are skipped."""
+        index = RunRangeIndex()
+        for filename in filenames:
+            runs = parseRunRange(filename)
+            if runs is not None:
+                index.add(runs[0], runs[1], filename)
+        return index
+
+    @staticmethod
+    def fromDirectory(direc, prefix=""):
+        """Build an index from the files in a directory whose names start
+        with "prefix" and end with a run range."""
+        filenames = [os.path.join(direc, name) for name in sorted(os.listdir(direc))
+                     if name.startswith(prefix)]
+        return RunRangeIndex.fromFilenames(filenames)
+
+    def add(self, start, stop, value):
+        """Add the closed range [start, stop]. A stop of None is open-ended."""
+        if stop is None:
+            stop = float("inf")
+        if stop < start:
+            raise RuntimeError("Run range %d-%d is backwards" % (start, stop))
+        i = bisect.bisect_right(self.__starts, start)
+        self.__starts.insert(i, start)
+        self.__stops.insert(i, stop)
+        self.__values.insert(i, value)
+        self.__maxStop.insert(i, stop)
+        self.__byValue.setdefault(value, []).append((start, stop))
+        self.__byValue[value].sort()
+        for j in range(max(i, 1), len(self.__maxStop)):
+            self.__maxStop[j] = max(self.__maxStop[j - 1], self.__stops[j])
+        self.__bounds = None
+
+    def __buildSegments(self):
+        """Split the runs at every start and after every stop. Within a
+        segment the same ranges apply, and the one that wins is the latest
+        in start order, so a sweep with a heap of the open ranges finds it."""
+        bounds = sorted(set(self.__starts)
+                        | set(stop + 1 for stop in self.__stops if stop != float("inf")))
+        winners = []
+        active = []  # (-index, stop) of the ranges that have started
+        i = 0
+        for bound in bounds:
+            while i < len(self.__starts) and self.__starts[i] <= bound:
+                heapq.heappush(active, (-i, self.__stops[i]))
+                i += 1
+            while len(active) > 0 and active[0][1] < bound:
+                heapq.heappop(active)  # ended before this segment
+            winners.append(-active[0][0] if len(active) > 0 else None)
+        self.__bounds = bounds
+        self.__winners = winners
+
+    def __winner(self, run):
+        """Index of the range that applies to the run, or None"""
+        if self.__bounds is None:
+            self.__buildSegments()
+        k = bisect.bisect_right(self.__bounds, run) - 1
+        if k < 0:
+            return None
+        return self.__winners[k]
+
+    def __len__(self):
+        return len(self.__values)
+
+    def findAll(self, run):
+        """All values whose range contains the run, latest start first."""
+        result = []
+        i = bisect.bisect_right(self.__starts, run) - 1
+        # nothing at or before i reaches the run once the running maximum is too small
+        while i >= 0 and self.__maxStop[i] >= run:
+            if self.__stops[i] >= run:
+                result.append(self.__values[i])
+            i -= 1
+        return result
+
+    def find(self, run):
+        """The value whose range contains the run. Raises KeyError if there
+        is none."""
+        i = self.__winner(run)
+        if i is None:
+            raise KeyError("No range contains run %d" % run)
+        return self.__values[i]
+
+    def __getitem__(self, run):
+        return self.find(run)
+
+    def __contains__(self, run):
+        return self.__winner(run) is not None
+
+    def ranges(self, value):
+        """The (start, stop) ranges that map to a value. An open-ended range
+        has stop=None."""
+        return [(start, stop if stop != float("inf") else None)
+                for start, stop in self.__byValue.get(value, [])]
+
+    def items(self):
+        """(start, stop, value) for every range sorted by start."""
+        return [(start, stop if stop != float("inf") else None, value)
+                for start, stop, value in zip(self.__starts, self.__stops, self.__values)]
+
+
+class RunSet:
+    """Set of run numbers held as sorted, disjoint closed ranges. Parsing,
+    merging and the set operations work on the k ranges in O(k log k)
+    rather than on every run they contain."""
+
+    def __init__(self, ranges=None):
+        self.__ranges = RunSet.__normalize(ranges if ranges is not None else [])
+
+    @staticmethod
+    def __normalize(ranges):
+        """Sort closed ranges and merge the ones that overlap or touch"""
+        result = []
+        for start, stop in sorted(ranges):
+            if stop < start:
+                raise RuntimeError("Run range %d-%d is backwards" % (start, stop))
+            if len(result) > 0 and start <= result[-1][1] + 1:
+                if stop > result[-1][1]:
+                    result[-1] = (result[-1][0], stop)
+            else:
+                result.append((start, stop))
+        return result
+
+    @staticmethod
+    def parse(args, verbose=False):
+        """Build a set from a string like '12-15,30-33' or a list of them.
+        Backwards ranges are reversed. Pieces that are not a run or a range
+        of runs are skipped, with a warning if verbose."""
+        if not isinstance(args, list):
+            args = [args]
+        ranges = []
+        for arg in args:
+            for piece in str(arg).split(','):
+                try:
+                    ends = [int(end) for end in piece.split('-')]
+                    if len(ends) > 2:
+                        raise ValueError("too many dashes")
+                except ValueError:
+                    if verbose:
+                        print("WARN: Skipping range \"%s\"" % piece)
+                    continue
+                ranges.append((min(ends), max(ends)))
+        return RunSet(ranges)
+
+    @staticmethod
+    def fromRuns(runs):
+        """Build a set from individual run numbers in any order"""
+        ranges = []
+        for run in sorted(set(runs)):
+            if len(ranges) > 0 and run == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], run)
+            else:
+                ranges.append((run, run))
+        return RunSet(ranges)
+
+    def ranges(self):
+        """The (start, stop) ranges sorted by start"""
+        return list(self.__ranges)
+
+    def runs(self):
+        """Sorted list of every run in the set"""
+        return list(iter(self))
+
+    def __iter__(self):
+        for start, stop in self.__ranges:
+            for run in range(start, stop + 1):
+                yield run
+
+    def __len__(self):
+        return sum(stop - start + 1 for start, stop in self.__ranges)
+
+    def __bool__(self):
+        return len(self.__ranges) > 0
+    __nonzero__ = __bool__
+
+    def __contains__(self, run):
+        i = bisect.bisect_right(self.__ranges, (run, float("inf"))) - 1
+        return i >= 0 and self.__ranges[i][1] >= run
+
+    def __eq__(self, other):
+        return isinstance(other, RunSet) and self.__ranges == other.ranges()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def union(self, other):
+        return RunSet(self.__ranges + other.ranges())
+
+    def intersection(self, other):
+        """Runs in both sets, found by walking the two range lists together"""
+        left, right = self.__ranges, other.ranges()
+        result = []
+        i, j = 0, 0
+        while i < len(left) and j < len(right):
+            start = max(left[i][0], right[j][0])
+            stop = min(left[i][1], right[j][1])
+            if start <= stop:
+                result.append((start, stop))
+            # advance whichever range ends first
+            if left[i][1] < right[j][1]:
+                i += 1
+            else:
+                j += 1
+        return RunSet(result)
+
+    def difference(self, other):
+        """Runs in this set that are not in the other"""
+        right = other.ranges()
+        result = []
+        j = 0
+        for start, stop in self.__ranges:
+            # skip the ranges that end before this one starts
+            while j < len(right) and right[j][1] < start:
+                j += 1
+            k = j
+            while k < len(right) and right[k][0] <= stop:
+                if right[k][0] > start:
+                    result.append((start, right[k][0] - 1))
+                start = max(start, right[k][1] + 1)
+                k += 1
+            if start <= stop:
+                result.append((start, stop))
+        return RunSet(result)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __str__(self):
+        """Condensed form like '12-15,30-33'"""
+        return ",".join(str(start) if start == stop else "%d-%d" % (start, stop)
+                        for start, stop in self.__ranges)
+
+    def __repr__(self):
+        return "RunSet('%s')" % str(self)
+
+
+if __name__ == "__main__":
+    import sys
+    index = RunRangeIndex.fromDirectory("SNS/CNCS", "CNCS_geom_")
+    for start, stop, filename in index.items():
+        print(start, stop, filename)
+    for run in sys.argv[1:]:
+        print(run, index.find(int(run)))
@@ -0,0 +1,82 @@
+#!/bin/env python
+from run_ranges import RunRangeIndex, RunSet, parseRunRange
+import random
+import unittest
+
+
+class TestParseRunRange(unittest.TestCase):
+    def testNames(self):
+        self.assertEqual(parseRunRange("SNS/CNCS/CNCS_geom_53377-67316.txt"), (53377, 67316))
+        self.assertEqual(parseRunRange("CNCS_geom_159160-.txt"), (159160, None))
+        self.assertEqual(parseRunRange("CNCS_geom_2017B.txt"), None)
+        self.assertRaises(RuntimeError, parseRunRange, "CNCS_geom_20-10.txt")
+
+
+class TestRunRangeIndex(unittest.TestCase):
+    def testFind(self):
+        index = RunRangeIndex.fromFilenames(["CNCS_geom_10-19.txt", "CNCS_geom_2017B.txt",
+                                             "CNCS_geom_30-.txt", "CNCS_geom_20-29.txt"])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.find(10), "CNCS_geom_10-19.txt")
+        self.assertEqual(index.find(29), "CNCS_geom_20-29.txt")
+        self.assertEqual(index[1000000], "CNCS_geom_30-.txt")
+        self.assertRaises(KeyError, index.find, 9)
+        self.assertEqual(index.ranges("CNCS_geom_30-.txt"), [(30, None)])
+
+    def testOverlap(self):
+        index = RunRangeIndex([(1, 100, "a"), (50, 60, "b"), (10, 20, "a")])
+        self.assertEqual(index.find(55), "b")
+        self.assertEqual(index.find(70), "a")
+        self.assertEqual(index.findAll(15), ["a", "a"])
+        self.assertFalse(101 in index)
+        self.assertEqual(index.ranges("a"), [(1, 100), (10, 20)])
+
+    def testSegments(self):
+        # open-ended and equal starts, checked against walking all of the ranges
+        rng = random.Random(3)
+        index = RunRangeIndex([(0, None, "open")])
+        for i in range(40):
+            start = rng.randint(0, 200)
+            index.add(start, None if i % 13 == 0 else start + rng.randint(0, 30), i)
+            self.assertEqual(index.find(start), index.findAll(start)[0])  # rebuilt after each add
+        for run in range(-5, 260):
+            if run < 0:
+                self.assertFalse(run in index)
+                continue
+            self.assertTrue(run in index)
+            self.assertEqual(index.find(run), index.findAll(run)[0])
+        index = RunRangeIndex([(5, 5, "x"), (5, 6, "y")])
+        self.assertEqual((index.find(5), index.find(6)), ("y", "y"))
+        self.assertRaises(KeyError, index.find, 7)
+        self.assertRaises(KeyError, RunRangeIndex().find, 7)
+
+
+class TestRunSet(unittest.TestCase):
+    def testParse(self):
+        runs = RunSet.parse(["12-15,30-33", "14-17,9,8", "40-38", "a,1-2-3,"])
+        self.assertEqual(runs.ranges(), [(8, 9), (12, 17), (30, 33), (38, 40)])
+        self.assertEqual(str(runs), "8-9,12-17,30-33,38-40")
+        self.assertEqual(len(runs), 2 + 6 + 4 + 3)
+        self.assertEqual(runs.runs()[:4], [8, 9, 12, 13])
+        self.assertTrue(17 in runs)
+        self.assertFalse(18 in runs)
+        self.assertFalse(7 in runs)
+        self.assertEqual(RunSet.fromRuns([7, 3, 1, 2, 3]), RunSet.parse("1-3,7"))
+        self.assertEqual(str(RunSet()), "")
+
+    def testOperations(self):
+        left = RunSet.parse("1-10,20-30,40")
+        right = RunSet.parse("5-22,25,28-45")
+        self.assertEqual(str(left | right), "1-45")
+        self.assertEqual(str(left & right), "5-10,20-22,25,28-30,40")
+        self.assertEqual(str(left - right), "1-4,23-24,26-27")
+        self.assertEqual(str(right - left), "11-19,31-39,41-45")
+        for first, second in ((left, right), (right, left)):
+            self.assertEqual((first - second).runs(),
+                             sorted(set(first.runs()) - set(second.runs())))
+            self.assertEqual((first & second).runs(),
+                             sorted(set(first.runs()) & set(second.runs())))
+
+
+if __name__ == "__main__":
+    unittest.main(module="run_ranges_test", verbosity=2)
@@ -19,12 +19,12 @@ TUBE_THICKNESS = ("tube_thickness", 0.0008, "metre")
 TUBE_TEMPERATURE = ("tube_temperature", 290.0, "K")
     
 def convert(value):
-    return float(value) / CONVERT_TO_METERS
+    return value / CONVERT_TO_METERS
     
 if __name__ == "__main__":
     import sys
     from helper import MantidGeom
-    from sns_ncolumn import readFile
+    from sns_ncolumn import readColumns
     
     try:
         geom_input_file = sys.argv[1]
@@ -38,8 +38,13 @@ if __name__ == "__main__":
 
     # Get geometry information file
 
-    detinfo = readFile(geom_input_file)
-    num_dets = len(detinfo.values()[0])
+    detinfo = readColumns(geom_input_file,
+                          dtypes={"X": float, "Y": float, "Z": float, "Angle": float})
+    num_dets = detinfo["Location"].size
+    xpos = convert(detinfo["X"])
+    ypos = convert(detinfo["Y"])
+    zpos = convert(detinfo["Z"])
+    roty = detinfo["Angle"] + FLIPY
     xml_outfile = INST_NAME+"_Definition.xml"
     
     det = MantidGeom(INST_NAME, comment=comment, valid_from=valid_from)
@@ -75,10 +80,6 @@ if __name__ == "__main__":
 
         det.addComponent(location, root=doc_handle)
         
-        xpos = convert(detinfo["X"][i])
-        ypos = convert(detinfo["Y"][i])
-        zpos = convert(detinfo["Z"][i])
-        roty = float(detinfo["Angle"][i]) + FLIPY
         det_type = "eightpack"
         
         if location.startswith("C"):
@@ -87,7 +88,7 @@ if __name__ == "__main__":
             elif location.endswith("B"):
                 det_type = "eightpack-bottom"
 
-        det.addDetector(xpos, ypos, zpos, ROTX, roty, ROTZ, location, det_type)
+        det.addDetector(xpos[i], ypos[i], zpos[i], ROTX, roty[i], ROTZ, location, det_type)
 
     det.addComment("STANDARD 8-PACK")
     det.addNPack("eightpack", NUM_TUBES_PER_BANK, TUBE_WIDTH, AIR_GAP_WIDTH)
@@ -1,57 +1,87 @@
 #!/usr/bin/env python
 import os
+import numpy as np
+from parse_cache import cached
 
+WHITESPACE = r'\s+'
 
-def readFile(filename, hasLabels=True, headerLines=0, delimiter=r'\s+'):
-    """This loads in a n-column ascii file and converts it into a dictionary
-    where the column headings are the keys, and the columns are as a list in
-    the value. If the "hasLabels" variable is False then the keys are the
-    column numbers."""
 
+def __readTokens(filename, hasLabels, headerLines, delimiter):
+    """Read the whole file into a 2D array of strings in a single pass and
+    split off the labels. Rows must all have the same number of columns."""
     if not os.path.exists(filename):
         raise RuntimeError("File '%s' does not exist" % filename)
 
-    # load the file
-    with open(filename, "r") as datafile:
-        lines = []
-        numcol = None
-        import re
-        splitter = re.compile(delimiter)
-        for linenum, line in enumerate(datafile):
-            if linenum < headerLines:
-                continue
-            line = line.strip()
-            if len(line) > 0:
-                line = splitter.split(line)
-                if numcol is None:
-                    numcol = len(line)
-                else:
-                    if numcol != len(line):
-                        raise Exception("Number of columns varies at line %d in '%s'"
-                                        % (linenum, filename))
-                lines.append(line)
-
-    # set up resulting data structure
-    if (hasLabels):
-        labels = lines[0]
-        lines = lines[1:]
+    if delimiter == WHITESPACE:
+        delimiter = None  # numpy splits on any run of whitespace
+
+    try:
+        tokens = np.loadtxt(filename, dtype=str, delimiter=delimiter,
+                            skiprows=headerLines, comments=None, ndmin=2)
+    except ValueError as e:
+        raise RuntimeError("Number of columns varies in '%s': %s" % (filename, e))
+    if delimiter is not None:
+        tokens = np.char.strip(tokens)
+
+    if hasLabels:
+        labels = [str(label) for label in tokens[0]]
+        tokens = tokens[1:]
     else:
-        labels = range(numcol)
-    result = {}
-    for label in labels:
-        result[label] = []
+        labels = list(range(tokens.shape[1]))
+    return labels, tokens
+
+
+def __inferType(column):
+    """Convert a column of strings to the first of int, float or str that
+    represents every value."""
+    for dtype in (np.int64, np.float64):
+        try:
+            return column.astype(dtype)
+        except ValueError:
+            pass
+    return column
+
 
-    # convert it into a different form
-    for line in lines:
-        for (label, value) in zip(labels, line):
-            result[label].append(value)
+@cached(version=1)
+def readColumns(filename, hasLabels=True, headerLines=0, delimiter=WHITESPACE, dtypes=None):
+    """This loads in a n-column ascii file and converts it into a dictionary
+    where the column headings are the keys, and the columns are typed numpy
+    arrays in the value. If the "hasLabels" variable is False then the keys
+    are the column numbers.
+
+    The type of each column is inferred as int, float or str unless it is
+    given in "dtypes", a dictionary of key to numpy dtype. Unlike readFile,
+    the delimiter is a literal string (or the default whitespace), not a
+    general regular expression. The result is cached when the
+    MANTIDGEOMETRY_CACHE environment variable is set."""
+    labels, tokens = __readTokens(filename, hasLabels, headerLines, delimiter)
+    if dtypes is None:
+        dtypes = {}
 
-    # return the result
+    unknown = set(dtypes.keys()) - set(labels)
+    if unknown:
+        raise RuntimeError("Columns %s not found in '%s'" % (sorted(unknown, key=str), filename))
+
+    result = {}
+    for i, label in enumerate(labels):
+        if label in dtypes:
+            result[label] = tokens[:, i].astype(dtypes[label])
+        else:
+            result[label] = __inferType(tokens[:, i])
     return result
 
 
+def readFile(filename, hasLabels=True, headerLines=0, delimiter=WHITESPACE):
+    """This loads in a n-column ascii file and converts it into a dictionary
+    where the column headings are the keys, and the columns are as a list of
+    strings in the value. If the "hasLabels" variable is False then the keys
+    are the column numbers. New code should use readColumns."""
+    labels, tokens = __readTokens(filename, hasLabels, headerLines, delimiter)
+    return dict((label, tokens[:, i].tolist()) for i, label in enumerate(labels))
+
+
 if __name__ == "__main__":
-    info = readFile("SEQ_geom.txt")
+    info = readColumns("SEQ_geom.txt")
     print("******************************")
     for key in info.keys():
         print(key, info[key][0])
@@ -0,0 +1,55 @@
+#!/bin/env python
+from sns_ncolumn import readColumns, readFile
+import numpy as np
+import os
+import tempfile
+import unittest
+
+TEXT = """Location\tX\tY\tZ
+A1\t183.281694\t-102\t116.172646
+A2\t178.34691\t-102\t123.615426
+"""
+
+
+class TestReadColumns(unittest.TestCase):
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w") as datafile:
+            datafile.write(TEXT)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def testInferTypes(self):
+        info = readColumns(self.filename)
+        self.assertEqual(sorted(info.keys()), ["Location", "X", "Y", "Z"])
+        self.assertEqual(info["Location"].tolist(), ["A1", "A2"])
+        self.assertEqual(info["X"].dtype, np.float64)
+        self.assertEqual(info["Y"].dtype, np.int64)
+        self.assertEqual(info["Z"][1], 123.615426)
+
+    def testSchema(self):
+        info = readColumns(self.filename, dtypes={"Y": float, "X": str})
+        self.assertEqual(info["Y"].dtype, np.float64)
+        self.assertEqual(info["X"].tolist(), ["183.281694", "178.34691"])
+        self.assertRaises(RuntimeError, readColumns, self.filename, dtypes={"W": float})
+
+    def testNoLabels(self):
+        info = readColumns(self.filename, hasLabels=False, headerLines=1)
+        self.assertEqual(sorted(info.keys()), [0, 1, 2, 3])
+        self.assertEqual(info[2].tolist(), [-102, -102])
+
+    def testReadFile(self):
+        info = readFile(self.filename)
+        self.assertEqual(info["X"], ["183.281694", "178.34691"])
+        self.assertEqual(info["Location"], ["A1", "A2"])
+
+    def testBadColumns(self):
+        with open(self.filename, "a") as datafile:
+            datafile.write("A3\t1.\t2.\n")
+        self.assertRaises(RuntimeError, readColumns, self.filename)
+        self.assertRaises(RuntimeError, readColumns, "does_not_exist.txt")
+
+
+if __name__ == "__main__":
+    unittest.main(module="sns_ncolumn_test", verbosity=2)
@@ -3,7 +3,7 @@ from helper import INCH_TO_METRE, MantidGeom
 from lxml import etree as le  # python-lxml on rpm based systems
 import numpy as np
 from rectangle import Rectangle, Vector, makeLocation
-from sns_ncolumn import readFile
+from sns_ncolumn import readColumns
 
 L1: float = -43.754  # meter
 TUBE_LENGTH: float = 1.0  # meter
@@ -46,89 +46,71 @@ this script generates the IDF for phase II
 #CSV_FILE: str = 'SNS/VULCAN/VULCAN_geom_20210210.csv'
 CSV_FILE: str = 'BL7_combine_B1_B2_B3_B4_B5_20220420.csv'
 
+# corners of each bank in the order LL, UL, UR, LR
+# Rectangle says lower-left then clockwise
+# survey/alignment labeled them as "tube 1" (i.e. T1) as most downstream
+#
+# 20220413: Still waiting to receive metrology file, so have assumed convention
+# follows previous numbering (*TO CHECK*)
+# The following are ordered beam right, high to low angle. Then, beam left high to low
+# angle:
+BANK_CORNERS = {'bank5': ('D9T2B', 'D9T2T', 'D1T8T', 'D1T8B'),
+                'bank1': ('D20T2B', 'D20T2T', 'D1T8T', 'D1T8B'),
+                # 'bank6': ('D11T2B', 'D11T2T', 'D1T8T', 'D1T8B'),
+                'bank4': ('D1T2B', 'D1T2T', 'D18T8T', 'D18T8B'),
+                'bank3': ('D1T2B', 'D1T2T', 'D18T8T', 'D18T8B'),
+                'bank2': ('D1T2B', 'D1T2T', 'D20T8T', 'D20T8B')}
+
+
+def surveyLabel(bank_label: str, point: str) -> str:
+    '''Survey label of a point in a bank. Labelling of points follows metrology naming convention. In phase 1
+    this used HA = "high angle", BR = "beam right" and BL = "beam left". In phase 2 the labels start with the
+    bank number i.e. B1 = Bank1 etc.'''
+    return 'B{}_{}'.format(bank_label.replace('bank', ''), point)
+
+
+class SurveyPoints:
+    '''The survey parsed once into an (N, 3) array of x, y, z positions and a hash map from point label to row'''
+
+    def __init__(self, filename: str = CSV_FILE):
+        positions = readColumns(filename, delimiter=',',
+                                dtypes={'Point': str, 'X': float, 'Y': float, 'Z': float})
+        self.labels = positions['Point']
+        self.xyz = np.column_stack((positions['X'], positions['Y'], positions['Z']))
+        self.rows = {label: i for i, label in enumerate(self.labels)}
+        if len(self.rows) != self.labels.size:
+            raise RuntimeError('Found duplicate point labels in "{}"'.format(filename))
+
+    def index(self, labels) -> np.ndarray:
+        '''Rows for an array-like of labels'''
+        labels = np.asarray(labels)
+        try:
+            rows = [self.rows[label] for label in labels.ravel()]
+        except KeyError as e:
+            raise KeyError('Survey point {} not found'.format(e))
+        return np.array(rows, dtype=int).reshape(labels.shape)
+
+    def __getitem__(self, labels) -> np.ndarray:
+        return self.xyz[self.index(labels)]
+
+    def bank(self, bank_label: str) -> np.ndarray:
+        '''Rows of all of the points in a bank'''
+        return np.flatnonzero(np.char.startswith(self.labels, surveyLabel(bank_label, '')))
+
+
 def readPositions(filename: str = CSV_FILE):
     '''The CSV file has measurements of the front tubes of each 8-pack.
     The labels for banks were chosen by metrology team, and the number of banks changes with upgrade phase'''
-    # read in and delete unnecessary columns
-    positions = readFile(filename, delimiter=',')
-    #del positions['L']  # tube length
-    #del positions['C']  # tube centers
-
-    # set up a dict to split the data into, defined according to construction phase
-    banks_allpixels = {'bank1':{},
-                        'bank2':{},
-                        'bank3':{},
-                        'bank4':{},
-                        'bank5':{}}
-                        # 'bank6':{}}
-    for bank_label in banks_allpixels.keys():
-        for column in positions.keys():
-            banks_allpixels[bank_label][column] = []
-
-    # split the data into banks
-    # here labelling of points follows metrology naming convention. In phase 1 this used HA = "high angle", BR = "beam
-    # right and BL = "beam left". In phase 2 the plan is to label with bank number i.e. B1 = Bank1 etc. The way the following
-    # for loop is written, looks like we can associate multiple labels with the same bank. Only need to ensure that the
-    # the two conventions are mutually exclusive within the calibration file (should be true).
-    for i, point_label in enumerate(positions['Point']):
-        bank_label = ''
-        #Phase 1 labels
-        if point_label.startswith('B1_'):
-            bank_label = 'bank1'
-        elif point_label.startswith('B2_'):
-            bank_label = 'bank2'
-        elif point_label.startswith('B3_'):
-            bank_label = 'bank3'
-        elif point_label.startswith('B4_'):
-            bank_label = 'bank4'
-        elif point_label.startswith('B5_'):
-            bank_label = 'bank5'
-        elif point_label.startswith('B6_'):
-            bank_label = 'bank6'
-        if bank_label:
-            banks_allpixels[bank_label]['Point'].append(point_label.split('_')[-1])
-            banks_allpixels[bank_label]['X'].append(positions['X'][i])
-            banks_allpixels[bank_label]['Y'].append(positions['Y'][i])
-            banks_allpixels[bank_label]['Z'].append(positions['Z'][i])
-
-    # convert the positions to ndarray of float
-    for bank_label in banks_allpixels.keys():
-        for column in ['X', 'Y', 'Z']:
-            banks_allpixels[bank_label][column] = np.array(banks_allpixels[bank_label][column], dtype=float)
-
-    def pointFromName(pixels, label: str) -> Vector:
-        index = pixels['Point'].index(label)
-        return Vector(pixels['X'][index], pixels['Y'][index], pixels['Z'][index])
-
-    def rectangleFromName(pixels, corners) -> Rectangle:
-        points = [pointFromName(pixels, name) for name in corners]
-        return Rectangle(*points, tolerance_len=0.035)
-
-    # get the 4 corners into a structure to return
-    # corners in the order LL, UL, UR, LR
-    # Rectangle says lower-left then clockwise
-    # survey/alignment labeled them as "tube 1" (i.e. T1) as most downstream
-    #
-    # 20220413: Still waiting to receive metrology file, so have assumed convention
-    # follows previous numbering (*TO CHECK*)
-    # The following are ordered beam right, high to low angle. Then, beam left high to low
-    # angle:
-    banks = {}
-
-    banks['bank5'] = rectangleFromName(banks_allpixels['bank5'],
-                                       ('D9T2B', 'D9T2T', 'D1T8T', 'D1T8B'))
-    banks['bank1'] = rectangleFromName(banks_allpixels['bank1'],
-                                       ('D20T2B', 'D20T2T', 'D1T8T', 'D1T8B'))
-    #banks['bank6'] = rectangleFromName(banks_allpixels['bank6'],
-    #                                  ('D11T2B', 'D11T2T', 'D1T8T', 'D1T8B'))
-    banks['bank4'] = rectangleFromName(banks_allpixels['bank4'],
-                                       ('D1T2B', 'D1T2T', 'D18T8T', 'D18T8B'))
-    banks['bank3'] = rectangleFromName(banks_allpixels['bank3'],
-                                       ('D1T2B', 'D1T2T', 'D18T8T', 'D18T8B'))
-    banks['bank2'] = rectangleFromName(banks_allpixels['bank2'],
-                                       ('D1T2B', 'D1T2T', 'D20T8T', 'D20T8B'))
+    survey = SurveyPoints(filename)
 
+    # corners of all of the banks in one lookup - (banks, 4, 3)
+    labels = [[surveyLabel(bank_label, point) for point in corners]
+              for bank_label, corners in BANK_CORNERS.items()]
+    points = survey[labels]
 
+    banks = {}
+    for bank_label, corners in zip(BANK_CORNERS.keys(), points):
+        banks[bank_label] = Rectangle(*corners, tolerance_len=0.035)
     return banks
 
 
@@ -1,93 +1,113 @@
-from mantid.simpleapi import LoadEmptyInstrument
+"""
+Check the generated VULCAN IDF against the survey without Mantid. The IDF is
+expanded into the absolute pixel positions with idf_expander and every check
+is done on whole (tube, pixel) arrays.
+"""
 import numpy as np
-from vulcan_geometry import readPositions
+import sys
+from idf_expander import IdfExpander
+from vulcan_geometry import TUBE_PIXELS, SurveyPoints, readPositions
 
 
-def getTubeIds(compInfo, name):
-    # the component index for the bank as a whole
-    bankID = int(compInfo.indexOfAny(name))
+def getPositions(idf, name):
+    """x, y, z arrays of shape (tubes, pixels) for a bank"""
+    positions = idf.detectorPositions(name).reshape(-1, TUBE_PIXELS, 3)
+    return positions[..., 0], positions[..., 1], positions[..., 2]
 
-    # the bank is made of 8-packs
-    bank = []
-    eightpacks = compInfo.children(bankID)
-    for eightpack in eightpacks:
-        tubes = compInfo.children(int(eightpack))
 
-        eightpack = [compInfo.children(int(tube)) for tube in tubes]
-        bank.extend(eightpack)
-
-    # convert the result into a 2d array of integer indices
-    return np.asarray(bank, dtype=int)
-
-
-def getPositions(ids, compInfo):
-    x = np.zeros(ids.shape, dtype=float)
-    y = np.zeros(ids.shape, dtype=float)
-    z = np.zeros(ids.shape, dtype=float)
-    for i in range(ids.shape[0]):   # tube
-        for j in range(ids.shape[1]):  # pixel along the tube
-            x[i, j], y[i, j], z[i, j] = compInfo.position(int(ids[i, j]))
-    return x, y, z
+def nearestPixel(pixels, points):
+    """
+    Distance from every point to the closest pixel
+    @param pixels (N, 3) array
+    @param points (M, 3) array
+    """
+    # |p - q|^2 = |p|^2 + |q|^2 - 2 p.q without the (M, N, 3) intermediate
+    squared = (np.einsum('ij,ij->i', points, points)[:, np.newaxis]
+               + np.einsum('ij,ij->i', pixels, pixels)[np.newaxis, :]
+               - 2. * np.einsum('ik,jk->ij', points, pixels))
+    return np.sqrt(np.maximum(squared.min(axis=1), 0.))
 
 
 def position_to_str(x, y, z):
     return f'{x:7.4f}, {y:7.4f}, {z:7.4f}'
 
 
+def checkBank(name, x, y, z, center_exp):
+    """
+    Check the pixels of a bank against the expected layout
+    @param x, y, z (tubes, pixels) arrays of the pixel positions
+    @param center_exp expected center of the bank
+    @return list of the failed checks, empty if the bank is fine
+    """
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    # confirm which quadrants things are in - x-axis
+    #                  bank5 | bank4
+    #                        |      bank 3
+    # bank1----------------sample---------->(x) bank2
+    #                  bank6 |
+    #                        v     incident beam
+    #                       (z)
+    if name in ['bank1', 'bank5']:
+        check(np.all(x < 0.), 'x is not negative')
+    elif name in ['bank4', 'bank3', 'bank2']:
+        check(np.all(x > 0.), 'x is not positive')
+    # confirm which quadrants things are in - z-axis
+    if name in ['bank3', 'bank4', 'bank5']:
+        check(np.all(z < 0.), 'z is not negative')
+
+    # confirm that the y-center bank center
+    for label, values, expected in (('x', x, center_exp.x), ('y', y, center_exp.y), ('z', z, center_exp.z)):
+        check(abs(values.mean() - expected) < 1.5e-4,
+              f'detector panel {label}-center {values.mean():.4f} is not {expected:.4f}')
+
+    # confirm that the positions are constant in certain directions
+    check(np.all(np.abs(x[:, 1:] - x[:, :-1]) < 1.5e-4), 'everything in same tube has same x')
+    check(np.all(np.abs(y[1:, :] - y[:-1, :]) < 1.5e-4), 'everything in same row has same y')
+    check(np.all(np.abs(z[:, 1:] - z[:, :-1]) < 1.5e-4), 'everything in same tube has same z')
+
+    # verify the interleaving tubes: every other tube is same distance, so the
+    # in-plane distance alternates. Banks 1 and 2 start with the front tube and
+    # the others with the back one, so either order is fine.
+    distances = np.sqrt(np.square(x[:, 256]) + np.square(z[:, 256]))  # distance of in-plane
+    step = np.sign(distances[1:] - distances[:-1])
+    check(step[0] != 0. and np.all(step[::2] == step[0]) and np.all(step[1::2] == -step[0]),
+          'tubes do not interleave')
+
+    # confirm that the positions are increasing in other directions
+    check(np.all(y[:, :-1] < y[:, 1:]), 'everything in same row has increasing y')
+    return failures
+
+
+def validate(idf, banks_exp, names=('bank1', 'bank2', 'bank3', 'bank4', 'bank5')):  # , 'bank6'
+    """Dict of the failed checks of every bank, see checkBank"""
+    return dict((name, checkBank(name, *getPositions(idf, name), center_exp=banks_exp[name].center))
+                for name in names)
+
+
 if __name__ == "__main__":
-    vulcan = LoadEmptyInstrument(Filename='VULCAN_Definition_tmp.xml', OutputWorkspace='vulcan')
-    compInfo = vulcan.componentInfo()
-    detInfo = vulcan.detectorInfo()
+    idf = IdfExpander('VULCAN_Definition_tmp.xml')
+    survey = SurveyPoints()
 
     banks_exp = readPositions()
     for name in ['bank1', 'bank2', 'bank3', 'bank4', 'bank5']:#, 'bank6']:
         print('--------------', name)
         for point in banks_exp[name].points:
             print(point)
+        # how far the surveyed tube ends are from the closest pixel centers
+        distances = nearestPixel(idf.detectorPositions(name), survey.xyz[survey.bank(name)])
+        print(f'survey to nearest pixel: max {distances.max():.4f}m mean {distances.mean():.4f}m')
 
-    for name in ['bank1', 'bank2', 'bank3', 'bank4', 'bank5']:#, 'bank6']:
+    failed = False
+    for name, failures in validate(idf, banks_exp).items():
         print('=========================', name)
-        bank = getTubeIds(compInfo, name)
-        x, y, z = getPositions(bank, compInfo)
-
-        # confirm which quadrants things are in - x-axis
-        #                  bank5 | bank4
-        #                        |      bank 3
-        # bank1----------------sample---------->(x) bank2
-        #                  bank6 |
-        #                        v     incident beam
-        #                       (z)
-        if name in ['bank1','bank5']:
-            assert np.alltrue(x < 0.)
-        elif name in ['bank4', 'bank3','bank2']:
-            assert np.alltrue(x > 0.)
-            # confirm which quadrants things are in - z-axis
-        if name in ['bank3','bank4','bank5']:
-            assert np.alltrue(z < 0.)
-
-        # confirm that the y-center bank center
-        center_exp = banks_exp[name].center
-        np.testing.assert_almost_equal(x.mean(), center_exp.x, err_msg='detector panel is x-center',
-                                       decimal=4)
-        np.testing.assert_almost_equal(y.mean(), center_exp.y, err_msg='detector panel is y-center',
-                                       decimal=4)
-        np.testing.assert_almost_equal(z.mean(), center_exp.z, err_msg='detector panel is z-center',
-                                       decimal=4)
-
-        # confirm that the positions are constant in certain directions
-        np.testing.assert_almost_equal(x[:, 1:] - x[:, :-1], 0., decimal=4,
-                                       err_msg="everything in same tube has same x")
-        np.testing.assert_almost_equal(y[1:, :] - y[:-1, :], 0., decimal=4,
-                                       err_msg="everything in same row has same y")
-        np.testing.assert_almost_equal(z[:, 1:] - z[:, :-1], 0., decimal=4,
-                                       err_msg="everything in same tube has same z")
-
-        # verify the interleaving tubes
-        distances = np.sqrt(np.square(x[:, 256]) + np.square(z[:, 256]))  # distance of in-plane
-        delta = distances[1:] - distances[:-1]  # every other tube is same distance
-        if name in ['bank1', 'bank2', 'bank3', 'bank4', 'bank5']:
-            assert np.alltrue(delta[::2] < 0.)
-            assert np.alltrue(delta[1::2] > 0.)
-
-        # confirm that the positions are increasing in other directions
-        np.testing.assert_array_less(y[:, :-1], y[:, 1:], err_msg="everything in same row has increasing y")
+        for failure in failures:
+            print('FAILED:', failure)
+        if not failures:
+            print('ok')
+        failed |= len(failures) > 0
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,44 @@
+#!/bin/env python
+from idf_expander import IdfExpander
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from vulcan_geometry import CSV_FILE, readPositions
+from vulcan_validate import checkBank, getPositions, validate
+
+DIREC = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestVulcanValidate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # the generator writes into and reads the survey from the working directory
+        cls.direc = tempfile.mkdtemp()
+        shutil.copy(os.path.join(DIREC, CSV_FILE), cls.direc)
+        subprocess.check_call([sys.executable, os.path.join(DIREC, 'vulcan_geometry.py')],
+                              cwd=cls.direc, stdout=subprocess.DEVNULL)
+        cls.idf = IdfExpander(os.path.join(cls.direc, 'VULCAN_Definition_tmp.xml'))
+        cls.banks_exp = readPositions(os.path.join(cls.direc, CSV_FILE))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.direc)
+
+    def testGenerated(self):
+        self.assertEqual(validate(self.idf, self.banks_exp),
+                         dict((name, []) for name in ('bank1', 'bank2', 'bank3', 'bank4', 'bank5')))
+
+    def testFailures(self):
+        x, y, z = getPositions(self.idf, 'bank3')
+        # swapping two tubes breaks the interleaving and nothing else
+        x, z = x[[1, 0] + list(range(2, x.shape[0]))], z[[1, 0] + list(range(2, z.shape[0]))]
+        self.assertEqual(checkBank('bank3', x, y, z, self.banks_exp['bank3'].center),
+                         ['tubes do not interleave'])
+        self.assertIn('x is not negative', checkBank('bank1', x, y, z, self.banks_exp['bank1'].center))
+
+
+if __name__ == "__main__":
+    unittest.main(module="vulcan_validate_test", verbosity=2)